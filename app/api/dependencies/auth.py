@@ -6,6 +6,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from app.api.dependencies.repository import get_repository
 from app.repository.user import UserRepository
 from app.securities.authorization.auth_handler import auth_handler
+from app.securities.authorization.identity_cache import identity_cache
 from app.utilities.db.user_actions import create_user_or_skip
 
 
@@ -17,12 +18,17 @@ async def auth_wrapper(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
         )
+
+    # Tokens that have already been verified by this worker
+    user_data = identity_cache.get_claims(auth.credentials)
+    if user_data:
+        return user_data
+
     user_data = await auth_handler.decode_token(auth.credentials)
 
     # Create new user (or skip if it exists) if token is received from Auth0
     if user_data["auth0"]:
-        new_user_data = await create_user_or_skip(user_repository, user_data)
-        if new_user_data:
-            return new_user_data
+        user_data = await create_user_or_skip(user_repository, user_data)
 
+    identity_cache.set_claims(auth.credentials, user_data)
     return user_data
@@ -0,0 +1,95 @@
+import time
+import uuid
+from typing import Any, Callable, Coroutine, Literal, Optional
+
+from fastapi import HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from app.config.logs.logger import logger
+from app.config.settings.base import settings
+from app.core.database import redis
+
+RateLimitKey = Literal["ip", "email"]
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """Parses the "<requests>/<seconds>" rate format, e.g. "10/60" """
+    limit, window = rate.split("/")
+    return int(limit), int(window)
+
+
+async def _get_client_ip(request: Request) -> Optional[str]:
+    return request.client.host if request.client else None
+
+
+async def _get_body_email(request: Request) -> Optional[str]:
+    # The body is cached by the request, so the endpoint still receives it
+    try:
+        body: Any = await request.json()
+    except ValueError:
+        return None
+
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+async def hit(key: str, limit: int, window: int) -> Optional[float]:
+    """Registers a request in the sliding window of the key.
+
+    Returns the number of seconds until the next request is allowed if the limit
+    has been exceeded, None otherwise
+    """
+    now = time.time()
+    member = f"{now}:{uuid.uuid4().hex}"
+
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zremrangebyscore(key, 0, now - window)
+        pipe.zadd(key, {member: now})
+        pipe.zcard(key)
+        pipe.zrange(key, 0, 0, withscores=True)
+        pipe.expire(key, window)
+        _, _, requests_count, oldest, _ = await pipe.execute()
+
+    if requests_count <= limit:
+        return None
+
+    # Rejected requests do not take place in the window
+    await redis.zrem(key, member)
+    oldest_timestamp = oldest[0][1] if oldest else now
+    return max(oldest_timestamp + window - now, 1)
+
+
+def rate_limit(
+    scope: str, rate: str, key: RateLimitKey = "ip"
+) -> Callable[[Request], Coroutine[Any, Any, None]]:
+    """Returns a dependency that limits the route to 'rate' requests per client IP
+    or per email from the request body"""
+    limit, window = parse_rate(rate)
+    get_identifier = _get_client_ip if key == "ip" else _get_body_email
+
+    async def _rate_limit(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        identifier = await get_identifier(request)
+        if not identifier:
+            return
+
+        try:
+            retry_after = await hit(
+                f"rate-limit:{scope}:{key}:{identifier}", limit, window
+            )
+        except RedisError as error:
+            # Unavailable Redis shouldn't block the authentication
+            logger.warning(f'Unable to check the "{scope}" rate limit: {error}')
+            return
+
+        if retry_after is not None:
+            logger.warning(f'Rate limit of "{scope}" exceeded by {key} "{identifier}"')
+            raise HTTPException(
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(int(retry_after + 0.5) or 1)},
+            )
+
+    return _rate_limit
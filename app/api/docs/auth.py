@@ -21,6 +21,7 @@ class AuthDocumentation(ResponseDocumentation):
             status.HTTP_422_UNPROCESSABLE_ENTITY: self._422_response(
                 ["body", "email"], "Input should be a valid string"
             ),
+            status.HTTP_429_TOO_MANY_REQUESTS: self._429_response(),
         }
 
         return responses
@@ -38,6 +39,7 @@ class AuthDocumentation(ResponseDocumentation):
             status.HTTP_422_UNPROCESSABLE_ENTITY: self._422_response(
                 ["body", "email"], "Input should be a valid string"
             ),
+            status.HTTP_429_TOO_MANY_REQUESTS: self._429_response(),
         }
 
         return responses
@@ -50,6 +52,7 @@ class AuthDocumentation(ResponseDocumentation):
             status.HTTP_422_UNPROCESSABLE_ENTITY: self._422_response(
                 ["body", "email"], "Input should be a valid string"
             ),
+            status.HTTP_429_TOO_MANY_REQUESTS: self._429_response(),
         }
 
         return responses
@@ -19,6 +19,12 @@ class ResponseDocumentation:
             },
         }
 
+    def _304_response(
+        self,
+        description: str = "The resource hasn't changed since the ETag passed in 'If-None-Match'",
+    ) -> dict[str, Any]:
+        return {"description": description}
+
     def _401_response(
         self,
         description: str = "Token decode error or token was not provided",
@@ -55,6 +61,16 @@ class ResponseDocumentation:
             "content": {"application/json": {"example": example}},
         }
 
+    def _429_response(
+        self,
+        description: str = "Too many requests, the 'Retry-After' header contains the delay in seconds",
+        example: dict[Any] = {"detail": "Too many requests, try again later"},
+    ) -> dict[str, Any]:
+        return {
+            "description": description,
+            "content": {"application/json": {"example": example}},
+        }
+
     def _422_response(
         self,
         loc: list[str],
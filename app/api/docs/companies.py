@@ -15,6 +15,7 @@ class CompanyDocumentation(ResponseDocumentation):
     def get_company(self) -> dict[int, dict]:
         responses: dict[int, dict] = {
             **self._default_company_responses(),
+            status.HTTP_304_NOT_MODIFIED: self._304_response(),
             status.HTTP_422_UNPROCESSABLE_ENTITY: self._422_response(
                 ["path", "company_id"],
                 "Input should be a valid integer, unable to parse string as an integer",
@@ -81,6 +82,30 @@ class CompanyDocumentation(ResponseDocumentation):
 
         return responses
 
+    def search_members(self) -> dict[int, dict]:
+        responses: dict[int, dict] = {
+            **self._default_company_responses(),
+            status.HTTP_400_BAD_REQUEST: self._400_response("Invalid cursor", "cursor"),
+            status.HTTP_403_FORBIDDEN: self._403_response(),
+            status.HTTP_422_UNPROCESSABLE_ENTITY: self._422_response(
+                ["query", "limit"], "Input should be greater than 0"
+            ),
+        }
+
+        return responses
+
+    def import_members(self) -> dict[int, dict]:
+        responses: dict[int, dict] = {
+            **self._default_company_responses(),
+            status.HTTP_403_FORBIDDEN: self._403_response(),
+            status.HTTP_422_UNPROCESSABLE_ENTITY: self._422_response(
+                ["path", "company_id"],
+                "Input should be a valid integer, unable to parse string as an integer",
+            ),
+        }
+
+        return responses
+
     def get_company_member(self) -> dict[int, dict]:
         responses: dict[int, dict] = {
             **self._default_company_responses(),
@@ -133,6 +158,22 @@ class CompanyDocumentation(ResponseDocumentation):
 
         return responses
 
+    def bulk_update_company_members(self) -> dict[int, dict]:
+        responses: dict[int, dict] = {
+            **self._default_company_responses(),
+            status.HTTP_400_BAD_REQUEST: self._400_response(
+                "Invalid role",
+                "role",
+            ),
+            status.HTTP_422_UNPROCESSABLE_ENTITY: self._422_response(
+                ["body", "member_ids"],
+                "List should have at least 1 item after validation, not 0",
+            ),
+            status.HTTP_403_FORBIDDEN: self._403_response(),
+        }
+
+        return responses
+
     def delete_company_member(self) -> dict[int, dict]:
         responses: dict[int, dict] = {
             **self._default_company_responses(),
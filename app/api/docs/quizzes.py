@@ -16,6 +16,7 @@ class QuizDocumentation(ResponseDocumentation):
     def get_quiz(self) -> dict[int, dict]:
         responses: dict[int, dict] = {
             **self._default_quiz_responses(),
+            status.HTTP_304_NOT_MODIFIED: self._304_response(),
             status.HTTP_422_UNPROCESSABLE_ENTITY: self._422_response(
                 ["path", "quiz_id"],
                 "Input should be a valid integer, unable to parse string as an integer",
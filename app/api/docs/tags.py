@@ -79,5 +79,29 @@ class TagDocumentantion(ResponseDocumentation):
 
         return responses
 
+    def assign_tag(self) -> dict[int, dict]:
+        responses: dict[int, dict] = {
+            **self._default_tag_responses(),
+            status.HTTP_422_UNPROCESSABLE_ENTITY: self._422_response(
+                ["body", "ids"],
+                "List should have at least 1 item after validation, not 0",
+            ),
+        }
+
+        return responses
+
+    def detach_tag(self) -> dict[int, dict]:
+        responses: dict[int, dict] = {
+            **self.assign_tag(),
+            status.HTTP_400_BAD_REQUEST: self._400_response(
+                "The users should keep at least one tag, "
+                "attach another tag before detaching this one",
+                "ids",
+                "The tag is the only tag of some of the users or quizzes",
+            ),
+        }
+
+        return responses
+
 
 tag_docs = TagDocumentantion()
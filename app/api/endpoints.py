@@ -3,6 +3,7 @@ from fastapi import APIRouter
 from app.api.routes.attempts import router as attempt_router
 from app.api.routes.auth import router as auth_router
 from app.api.routes.companies import router as company_router
+from app.api.routes.metrics import router as metrics_router
 from app.api.routes.quizzes import router as quiz_router
 from app.api.routes.tags import router as tag_router
 from app.api.routes.user_profile import router as profile_router
@@ -17,3 +18,4 @@ router.include_router(router=quiz_router)
 router.include_router(router=user_router)
 router.include_router(router=profile_router)
 router.include_router(router=tag_router)
+router.include_router(router=metrics_router)
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends
 
+from app.api.dependencies.rate_limit import rate_limit
 from app.api.dependencies.services import get_user_service
 from app.api.docs.auth import auth_docs
+from app.config.settings.base import settings
 from app.models.schemas.auth import (
     UserLoginInput,
     UserLoginOutput,
@@ -23,6 +25,7 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
     response_model=UserSignUpOutput,
     status_code=201,
     responses=auth_docs.signup(),
+    dependencies=[Depends(rate_limit("signup", settings.RATE_LIMIT_SIGNUP_IP))],
 )
 async def signup(
     user_data: UserSignUpInput, user_service: UserService = Depends(get_user_service)
@@ -33,7 +36,15 @@ async def signup(
     return await user_service.register_user(user_data)
 
 
-@router.post("/login/", response_model=UserLoginOutput, responses=auth_docs.login())
+@router.post(
+    "/login/",
+    response_model=UserLoginOutput,
+    responses=auth_docs.login(),
+    dependencies=[
+        Depends(rate_limit("login", settings.RATE_LIMIT_LOGIN_IP)),
+        Depends(rate_limit("login", settings.RATE_LIMIT_LOGIN_EMAIL, key="email")),
+    ],
+)
 async def login(
     user_data: UserLoginInput, user_service: UserService = Depends(get_user_service)
 ) -> UserLoginOutput:
@@ -47,6 +58,16 @@ async def login(
     "/forgot-password/",
     response_model=PasswordChangeOutput,
     responses=auth_docs.forgot_password(),
+    dependencies=[
+        Depends(rate_limit("forgot-password", settings.RATE_LIMIT_FORGOT_PASSWORD_IP)),
+        Depends(
+            rate_limit(
+                "forgot-password",
+                settings.RATE_LIMIT_FORGOT_PASSWORD_EMAIL,
+                key="email",
+            )
+        ),
+    ],
 )
 async def forgot_password(
     data: PasswordForgotInput, user_service: UserService = Depends(get_user_service)
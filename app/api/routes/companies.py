@@ -1,6 +1,6 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
 
 from app.api.dependencies.auth import auth_wrapper
 from app.api.dependencies.services import (
@@ -17,14 +17,23 @@ from app.models.schemas.companies import (
     CompanyCreate,
     CompanyCreateSuccess,
     CompanyUpdate,
+    CompanyUsersPage,
 )
 from app.models.schemas.company_user import CompanyFullSchema, UserFullSchema
 from app.models.schemas.quizzes import QuizListSchema
 from app.models.schemas.tags import TagBaseSchema
-from app.models.schemas.users import CompanyMemberInput, CompanyMemberUpdate
+from app.models.schemas.users import (
+    CompanyMemberInput,
+    CompanyMembersBulkUpdate,
+    CompanyMembersBulkUpdateOutput,
+    CompanyMemberUpdate,
+    MemberImportReport,
+)
 from app.services.company import CompanyService
 from app.services.quiz import QuizService
 from app.services.tag import TagService
+from app.utilities.formatters.csv_stream import iter_csv_records
+from app.utilities.http.etag import set_etag_headers, validate_etag
 
 router = APIRouter(
     prefix="/companies",
@@ -40,14 +49,30 @@ router = APIRouter(
 )
 async def get_company(
     company_id: int,
+    response: Response,
     filter: Optional[str] = "",
+    limit: Optional[int] = Query(None, gt=0),
+    offset: int = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
     company_service: CompanyService = Depends(get_company_service),
     auth=Depends(auth_wrapper),
 ) -> CompanyFullSchema:
     """
     ### Return a company data by id
+
+    Pass `limit` and `offset` to paginate the (filtered) company members
+
+    Supports conditional requests: pass the received `ETag` in the `If-None-Match`
+    header to get `304 Not Modified` if the company hasn't changed
     """
-    return await company_service.get_company_by_id(company_id, filter)
+    version = await company_service.get_company_version(company_id)
+    etag = company_service.get_company_etag(company_id, version, filter, limit, offset)
+    validate_etag(etag, if_none_match)
+
+    set_etag_headers(response, etag)
+    return await company_service.get_company_by_id(
+        company_id, filter, limit, offset, version=version
+    )
 
 
 @router.get(
@@ -66,6 +91,30 @@ async def get_tags_list(
     return await tag_service.get_company_tags(current_user_id, company_id)
 
 
+@router.get(
+    "/{company_id}/members/search/",
+    response_model=CompanyUsersPage,
+    responses=company_docs.search_members(),
+)
+async def search_company_members(
+    company_id: int,
+    query: str = Query(..., min_length=1),
+    limit: int = Query(20, gt=0, le=100),
+    cursor: Optional[str] = None,
+    current_user_id: int = Depends(get_current_user_id),
+    company_service: CompanyService = Depends(get_company_service),
+) -> CompanyUsersPage:
+    """
+    ### Search the company members by the name, email or phone number
+
+    Members are ranked by similarity to the query. Pass the received `next_cursor`
+    as `cursor` to get the next page
+    """
+    return await company_service.search_members(
+        company_id, query, limit, cursor, current_user_id
+    )
+
+
 @router.get(
     "/{company_id}/members/{member_id}/",
     response_model=UserFullSchema,
@@ -151,6 +200,61 @@ async def add_company_member(
     return await company_service.add_member(company_id, member_data, current_user_id)
 
 
+@router.post(
+    "/{company_id}/members/import/",
+    response_model=MemberImportReport,
+    responses=company_docs.import_members(),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"text/csv": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def import_company_members(
+    company_id: int,
+    request: Request,
+    current_user_id: int = Depends(get_current_user_id),
+    company_service: CompanyService = Depends(get_company_service),
+) -> MemberImportReport:
+    """
+    ### Allows company administration to import members from a CSV file
+
+    Send the file as the request body. The header row should contain the
+    `email`, `password`, `role` and `tags` columns (tag ids separated by `;`),
+    and optionally the `name` and `phone_number` columns.
+
+    Valid rows are imported even if other rows fail; the response lists the
+    failed rows with the reason
+    """
+    return await company_service.import_members(
+        company_id, iter_csv_records(request.stream()), current_user_id
+    )
+
+
+@router.patch(
+    "/{company_id}/members/bulk-update/",
+    response_model=CompanyMembersBulkUpdateOutput,
+    responses=company_docs.bulk_update_company_members(),
+)
+async def bulk_update_company_members(
+    company_id: int,
+    members_data: CompanyMembersBulkUpdate,
+    current_user_id: int = Depends(get_current_user_id),
+    company_service: CompanyService = Depends(get_company_service),
+) -> CompanyMembersBulkUpdateOutput:
+    """
+    ### Allows company administration to update many members at once
+
+    Sets the `role` and changes the tags of all the `member_ids`: either pass
+    `replace_tags` or any of `add_tags` and `remove_tags`. All the changes are
+    applied in a single transaction
+    """
+    return await company_service.bulk_update_members(
+        company_id, members_data, current_user_id
+    )
+
+
 @router.patch(
     "/{company_id}/members/{member_id}/update/",
     response_model=UserFullSchema,
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import generate_metrics
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """
+    ### Prometheus metrics of all the workers
+    """
+    # Defined as a sync endpoint, since collecting from the workers reads files
+    content, content_type = generate_metrics()
+    return Response(content, media_type=content_type)
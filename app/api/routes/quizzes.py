@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Response
 
 from app.api.dependencies.services import get_attempt_service, get_quiz_service
 from app.api.dependencies.user import get_current_user_id
@@ -16,6 +18,7 @@ from app.models.schemas.quizzes import (
 )
 from app.services.attempt import AttemptService
 from app.services.quiz import QuizService
+from app.utilities.http.etag import set_etag_headers, validate_etag
 
 router = APIRouter(prefix="/quizzes", tags=["Quizzes"])
 
@@ -27,12 +30,21 @@ router = APIRouter(prefix="/quizzes", tags=["Quizzes"])
 )
 async def get_quiz(
     quiz_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user_id: User = Depends(get_current_user_id),
     quiz_service: QuizService = Depends(get_quiz_service),
 ) -> QuizFullSchema | QuizEmployeeSchema:
     """
     ### Returns a quiz data by id
+
+    Supports conditional requests: pass the received `ETag` in the `If-None-Match`
+    header to get `304 Not Modified` if the quiz hasn't changed
     """
+    etag = await quiz_service.get_quiz_etag(quiz_id, current_user_id)
+    validate_etag(etag, if_none_match)
+
+    set_etag_headers(response, etag)
     return await quiz_service.get_quiz(quiz_id, current_user_id)
 
 
@@ -85,6 +97,8 @@ async def update_quiz(
 ) -> QuizFullSchema:
     """
     Allows to update a specific Quiz instance
+
+    "questions_per_attempt": null turns the question pool back into a full quiz
     """
     return await quiz_service.update_quiz(quiz_id, quiz_data, current_user_id)
 
@@ -4,6 +4,8 @@ from app.api.dependencies.services import get_tag_service
 from app.api.dependencies.user import get_current_user_id
 from app.api.docs.tags import tag_docs
 from app.models.schemas.tags import (
+    TagAssignmentInput,
+    TagAssignmentOutput,
     TagCreateInput,
     TagCreateOutput,
     TagSchema,
@@ -73,3 +75,89 @@ async def delete_tag(
     ### Allows to delete a specific Tag instance
     """
     return await tag_service.delete_tag(tag_id, current_user_id)
+
+
+@router.post(
+    "/{tag_id}/users/attach/",
+    response_model=TagAssignmentOutput,
+    responses=tag_docs.assign_tag(),
+)
+async def attach_tag_to_users(
+    tag_id: int,
+    data: TagAssignmentInput,
+    current_user_id: int = Depends(get_current_user_id),
+    tag_service: TagService = Depends(get_tag_service),
+) -> TagAssignmentOutput:
+    """
+    ### Attaches the tag to the company members in one request
+
+    Returns the number of the created links
+
+    Users that are not the company members are skipped
+    """
+    return await tag_service.attach_to_users(tag_id, data.ids, current_user_id)
+
+
+@router.post(
+    "/{tag_id}/users/detach/",
+    response_model=TagAssignmentOutput,
+    responses=tag_docs.detach_tag(),
+)
+async def detach_tag_from_users(
+    tag_id: int,
+    data: TagAssignmentInput,
+    current_user_id: int = Depends(get_current_user_id),
+    tag_service: TagService = Depends(get_tag_service),
+) -> TagAssignmentOutput:
+    """
+    ### Detaches the tag from the company members in one request
+
+    Returns the number of the removed links
+
+    Every member should keep at least one tag, so the tag can't be detached from the
+    users it is the only tag of
+    """
+    return await tag_service.detach_from_users(tag_id, data.ids, current_user_id)
+
+
+@router.post(
+    "/{tag_id}/quizzes/attach/",
+    response_model=TagAssignmentOutput,
+    responses=tag_docs.assign_tag(),
+)
+async def attach_tag_to_quizzes(
+    tag_id: int,
+    data: TagAssignmentInput,
+    current_user_id: int = Depends(get_current_user_id),
+    tag_service: TagService = Depends(get_tag_service),
+) -> TagAssignmentOutput:
+    """
+    ### Attaches the tag to the company quizzes in one request
+
+    Returns the number of the created links
+
+    Quizzes of other companies are skipped
+    """
+    return await tag_service.attach_to_quizzes(tag_id, data.ids, current_user_id)
+
+
+@router.post(
+    "/{tag_id}/quizzes/detach/",
+    response_model=TagAssignmentOutput,
+    responses=tag_docs.detach_tag(),
+)
+async def detach_tag_from_quizzes(
+    tag_id: int,
+    data: TagAssignmentInput,
+    current_user_id: int = Depends(get_current_user_id),
+    tag_service: TagService = Depends(get_tag_service),
+) -> TagAssignmentOutput:
+    """
+    ### Detaches the tag from the company quizzes in one request
+
+    Returns the number of the removed links
+
+    Every quiz should keep at least one tag, so the tag can't be detached from the
+    quizzes it is the only tag of
+    """
+    return await tag_service.detach_from_quizzes(tag_id, data.ids, current_user_id)
@@ -1,11 +1,25 @@
+import json
 import logging
+import logging.config
+import queue
 import sys
 from copy import copy
-from typing import Literal, Optional
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Literal, Optional
 
 import click
 
 from app.config.settings.base import settings
+from app.core.request_id import request_id
+
+# Attributes of every record, the rest of them come from 'extra'
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {
+    "message",
+    "asctime",
+    "color_message",
+    "request_id",
+}
 
 
 class ColorizedFormatter(logging.Formatter):
@@ -55,19 +69,76 @@ class ColorizedFormatter(logging.Formatter):
         return super().formatMessage(recordcopy)
 
 
+class RequestIdFilter(logging.Filter):
+    """Adds the id of the current request to the record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Records from the queue already have the id of the emitting request
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats the record as a single line JSON object with the fields passed in
+    'extra' at the top level"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_entry: dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, tz=timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "function": record.funcName,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        log_entry.update(
+            (key, value)
+            for key, value in record.__dict__.items()
+            if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            log_entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(log_entry, default=str)
+
+
+class LocalQueueHandler(QueueHandler):
+    """Puts the records to the in-process queue as they are, so that formatting
+    and writing happen in the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The message is rendered now, since its arguments may change later
+        record = copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
 LOGGING_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
         "default": {
             "()": "app.config.logs.log_config.ColorizedFormatter",
-            "fmt": "%(asctime)s | %(levelprefix)s | %(funcName)s | %(message)s",
+            "fmt": "%(asctime)s | %(levelprefix)s | %(request_id)s | %(funcName)s | %(message)s",
             "use_colors": True,
         },
+        "json": {
+            "()": "app.config.logs.log_config.JSONFormatter",
+        },
+    },
+    "filters": {
+        "request_id": {
+            "()": "app.config.logs.log_config.RequestIdFilter",
+        },
     },
     "handlers": {
         "default": {
-            "formatter": "default",
+            "formatter": "json" if settings.LOG_FORMAT == "json" else "default",
+            "filters": ["request_id"],
             "class": "logging.StreamHandler",
             "stream": "ext://sys.stdout",
         },
@@ -80,3 +151,26 @@ LOGGING_CONFIG = {
         },
     },
 }
+
+
+def setup_logging() -> Optional[QueueListener]:
+    """Applies the logging configuration. With LOG_QUEUE the records are handed
+    over to a background thread, so that the event loop never waits for stdout.
+    Returns the started listener, which has to be stopped on shutdown"""
+    logging.config.dictConfig(LOGGING_CONFIG)
+    if not settings.LOG_QUEUE:
+        return None
+
+    main_logger = logging.getLogger("main_logger")
+    handlers = list(main_logger.handlers)
+
+    # The request id is only available in the thread that emits the record
+    queue_handler = LocalQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RequestIdFilter())
+    for handler in handlers:
+        main_logger.removeHandler(handler)
+    main_logger.addHandler(queue_handler)
+
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -1,3 +1,45 @@
+import functools
+import inspect
 import logging
+from typing import Any, Awaitable, Callable, TypeVar
 
 logger = logging.getLogger("main_logger")
+
+AsyncFunction = TypeVar("AsyncFunction", bound=Callable[..., Awaitable[Any]])
+
+
+def log_arguments(func: AsyncFunction) -> AsyncFunction:
+    """Logs the arguments of every call at the debug level
+
+    The arguments are only formatted when debug logging is enabled, and the
+    record points to the decorated function rather than to the wrapper.
+    """
+    signature = inspect.signature(func)
+    code = func.__code__
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if logger.isEnabledFor(logging.DEBUG):
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            received = "\n".join(
+                f'"{name}" -> {value}'
+                for name, value in arguments.arguments.items()
+                if name != "self"
+            )
+            logger.handle(
+                logger.makeRecord(
+                    logger.name,
+                    logging.DEBUG,
+                    code.co_filename,
+                    code.co_firstlineno,
+                    f"Received data:\n{received}",
+                    None,
+                    None,
+                    func=func.__name__,
+                )
+            )
+
+        return await func(*args, **kwargs)
+
+    return wrapper
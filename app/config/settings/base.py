@@ -11,26 +11,186 @@ class BackendBaseSettings(BaseSettings):
     FRONT_PORT: int = decouple.config("FRONT_PORT", cast=int)
     DEBUG: bool = decouple.config("DEBUG", cast=bool)
     LOGGING_LEVEL: str = decouple.config("LOGGING_LEVEL")
+    # "console" or "json" (one object per line, for the log collectors)
+    LOG_FORMAT: str = decouple.config("LOG_FORMAT", default="console")
+    # Writes the logs from a background thread instead of the event loop
+    LOG_QUEUE: bool = decouple.config("LOG_QUEUE", default=False, cast=bool)
+    # Spans of the requests, services, repositories, SQL, Redis and Celery tasks
+    TRACING_ENABLED: bool = decouple.config("TRACING_ENABLED", default=False, cast=bool)
+    TRACING_SAMPLE_RATE: float = decouple.config(
+        "TRACING_SAMPLE_RATE", default=1.0, cast=float
+    )
+    # "console", "file" or empty to only propagate the trace context
+    TRACING_EXPORTER: str = decouple.config("TRACING_EXPORTER", default="console")
+    TRACING_FILE: str = decouple.config("TRACING_FILE", default="traces.jsonl")
     REDIS_URL: str = decouple.config("REDIS_URL")
     JWT_SECRET: str = decouple.config("JWT_SECRET")
     AUTH0_DOMAIN: str = decouple.config("AUTH0_DOMAIN")
     AUTH0_API_AUDIENCE: str = decouple.config("AUTH0_API_AUDIENCE")
     AUTH0_ALGORITHMS: str = decouple.config("AUTH0_ALGORITHMS")
     AUTH0_ISSUER: str = decouple.config("AUTH0_ISSUER")
+    # Defaults to the JWKS endpoint of AUTH0_DOMAIN
+    AUTH0_JWKS_URL: str = decouple.config("AUTH0_JWKS_URL", default="")
+    AUTH0_JWKS_CACHE_TTL: int = decouple.config(
+        "AUTH0_JWKS_CACHE_TTL", default=3600, cast=int
+    )
+    AUTH0_JWKS_MIN_REFRESH_INTERVAL: int = decouple.config(
+        "AUTH0_JWKS_MIN_REFRESH_INTERVAL", default=30, cast=int
+    )
+    AUTH0_JWKS_TIMEOUT: int = decouple.config("AUTH0_JWKS_TIMEOUT", default=5, cast=int)
     POSTGRES_USER: str = decouple.config("POSTGRES_USER")
     POSTGRES_PASSWORD: str = decouple.config("POSTGRES_PASSWORD")
     POSTGRES_DB: str = decouple.config("POSTGRES_DB")
     POSTGRES_PORT: int = decouple.config("POSTGRES_PORT", cast=int)
     POSTGRES_HOST: str = decouple.config("POSTGRES_HOST")
+    # Read-only repository methods go to the replica when its host is set
+    POSTGRES_REPLICA_HOST: str = decouple.config("POSTGRES_REPLICA_HOST", default="")
+    POSTGRES_REPLICA_PORT: int = decouple.config(
+        "POSTGRES_REPLICA_PORT", default=5432, cast=int
+    )
+    REPLICA_RETRY_INTERVAL: int = decouple.config(
+        "REPLICA_RETRY_INTERVAL", default=30, cast=int
+    )
     IS_ALLOWED_CREDENTIALS: bool = decouple.config("IS_ALLOWED_CREDENTIALS", cast=bool)
     SMTP_HOST: str = decouple.config("SMTP_HOST")
     SMTP_PORT: int = decouple.config("SMTP_PORT", cast=int)
     SMTP_USER: str = decouple.config("SMTP_USER")
     SMTP_PASSWORD: str = decouple.config("SMTP_PASSWORD")
 
+    # Connection pool of every worker process; the database (or PgBouncer) has to
+    # accept (DB_POOL_SIZE + DB_MAX_OVERFLOW) * workers count connections
+    DB_POOL_SIZE: int = decouple.config("DB_POOL_SIZE", default=5, cast=int)
+    DB_MAX_OVERFLOW: int = decouple.config("DB_MAX_OVERFLOW", default=10, cast=int)
+    DB_POOL_TIMEOUT: int = decouple.config("DB_POOL_TIMEOUT", default=30, cast=int)
+    DB_POOL_RECYCLE: int = decouple.config("DB_POOL_RECYCLE", default=1800, cast=int)
+    DB_POOL_PRE_PING: bool = decouple.config(
+        "DB_POOL_PRE_PING", default=True, cast=bool
+    )
+    DB_STATEMENT_CACHE_SIZE: int = decouple.config(
+        "DB_STATEMENT_CACHE_SIZE", default=100, cast=int
+    )
+    # Disables the prepared statements cache for PgBouncer in transaction mode
+    DB_PGBOUNCER_MODE: bool = decouple.config(
+        "DB_PGBOUNCER_MODE", default=False, cast=bool
+    )
+
+    # SQL logging: echo of all statements (development only), slow statements
+    # threshold in milliseconds (0 to disable) and share of the timed statements
+    SQL_ECHO: bool = decouple.config("SQL_ECHO", default=False, cast=bool)
+    SQL_SLOW_QUERY_THRESHOLD: int = decouple.config(
+        "SQL_SLOW_QUERY_THRESHOLD", default=200, cast=int
+    )
+    SQL_TIMING_SAMPLE_RATE: float = decouple.config(
+        "SQL_TIMING_SAMPLE_RATE", default=0.0, cast=float
+    )
+    SQL_LOG_MAX_LENGTH: int = decouple.config(
+        "SQL_LOG_MAX_LENGTH", default=1000, cast=int
+    )
+    # Warn when a statement is repeated this many times within one request (0 to
+    # disable)
+    N_PLUS_ONE_THRESHOLD: int = decouple.config(
+        "N_PLUS_ONE_THRESHOLD", default=5, cast=int
+    )
+
+    # Password hashing thread pool and bcrypt cost
+    PASSWORD_HASHING_WORKERS: int = decouple.config(
+        "PASSWORD_HASHING_WORKERS", default=2, cast=int
+    )
+    PASSWORD_HASHING_MAX_QUEUE: int = decouple.config(
+        "PASSWORD_HASHING_MAX_QUEUE", default=64, cast=int
+    )
+    # Separate pool of the member imports, its queue limit counts passwords
+    PASSWORD_BULK_HASHING_WORKERS: int = decouple.config(
+        "PASSWORD_BULK_HASHING_WORKERS", default=1, cast=int
+    )
+    PASSWORD_BULK_HASHING_MAX_QUEUE: int = decouple.config(
+        "PASSWORD_BULK_HASHING_MAX_QUEUE", default=1000, cast=int
+    )
+    BCRYPT_ROUNDS: int = decouple.config("BCRYPT_ROUNDS", default=12, cast=int)
+    PASSWORD_REHASH_ON_LOGIN: bool = decouple.config(
+        "PASSWORD_REHASH_ON_LOGIN", default=True, cast=bool
+    )
+
+    # Company membership (role) cache lifetime in Redis and in the worker memory
+    MEMBERSHIP_CACHE_TTL: int = decouple.config(
+        "MEMBERSHIP_CACHE_TTL", default=300, cast=int
+    )
+    MEMBERSHIP_LOCAL_CACHE_TTL: int = decouple.config(
+        "MEMBERSHIP_LOCAL_CACHE_TTL", default=5, cast=int
+    )
+    MEMBERSHIP_LOCAL_CACHE_SIZE: int = decouple.config(
+        "MEMBERSHIP_LOCAL_CACHE_SIZE", default=10000, cast=int
+    )
+
+    # Number of the CSV rows inserted with a single statement by the members import
+    MEMBER_IMPORT_BATCH_SIZE: int = decouple.config(
+        "MEMBER_IMPORT_BATCH_SIZE", default=500, cast=int
+    )
+
+    # Interval (in seconds) of the companies staff counters reconciliation
+    STAFF_COUNT_RECONCILE_INTERVAL: int = decouple.config(
+        "STAFF_COUNT_RECONCILE_INTERVAL", default=3600, cast=int
+    )
+
+    # Lifetime of the cached company pages (the cache is keyed by company version)
+    COMPANY_DETAILS_CACHE_TTL: int = decouple.config(
+        "COMPANY_DETAILS_CACHE_TTL", default=600, cast=int
+    )
+
+    # User tag ids cache lifetime in Redis and in the worker memory
+    USER_TAGS_CACHE_TTL: int = decouple.config(
+        "USER_TAGS_CACHE_TTL", default=300, cast=int
+    )
+    USER_TAGS_LOCAL_CACHE_TTL: int = decouple.config(
+        "USER_TAGS_LOCAL_CACHE_TTL", default=5, cast=int
+    )
+    USER_TAGS_LOCAL_CACHE_SIZE: int = decouple.config(
+        "USER_TAGS_LOCAL_CACHE_SIZE", default=10000, cast=int
+    )
+
+    # Company tags catalogue cache lifetime in Redis and in the worker memory
+    COMPANY_TAGS_CACHE_TTL: int = decouple.config(
+        "COMPANY_TAGS_CACHE_TTL", default=300, cast=int
+    )
+    COMPANY_TAGS_LOCAL_CACHE_TTL: int = decouple.config(
+        "COMPANY_TAGS_LOCAL_CACHE_TTL", default=5, cast=int
+    )
+    COMPANY_TAGS_LOCAL_CACHE_SIZE: int = decouple.config(
+        "COMPANY_TAGS_LOCAL_CACHE_SIZE", default=1000, cast=int
+    )
+
+    # Verified tokens and Auth0 users ids cache (in the worker memory)
+    AUTH_TOKEN_CACHE_SIZE: int = decouple.config(
+        "AUTH_TOKEN_CACHE_SIZE", default=10000, cast=int
+    )
+    AUTH_TOKEN_CACHE_TTL: int = decouple.config(
+        "AUTH_TOKEN_CACHE_TTL", default=900, cast=int
+    )
+    AUTH0_USER_ID_CACHE_TTL: int = decouple.config(
+        "AUTH0_USER_ID_CACHE_TTL", default=300, cast=int
+    )
+
+    # Rate limits of the auth endpoints, in the "<requests>/<seconds>" format
+    RATE_LIMIT_ENABLED: bool = decouple.config(
+        "RATE_LIMIT_ENABLED", default=True, cast=bool
+    )
+    RATE_LIMIT_LOGIN_IP: str = decouple.config("RATE_LIMIT_LOGIN_IP", default="30/60")
+    RATE_LIMIT_LOGIN_EMAIL: str = decouple.config(
+        "RATE_LIMIT_LOGIN_EMAIL", default="5/60"
+    )
+    RATE_LIMIT_SIGNUP_IP: str = decouple.config(
+        "RATE_LIMIT_SIGNUP_IP", default="5/3600"
+    )
+    RATE_LIMIT_FORGOT_PASSWORD_IP: str = decouple.config(
+        "RATE_LIMIT_FORGOT_PASSWORD_IP", default="10/3600"
+    )
+    RATE_LIMIT_FORGOT_PASSWORD_EMAIL: str = decouple.config(
+        "RATE_LIMIT_FORGOT_PASSWORD_EMAIL", default="3/3600"
+    )
+
     ALLOWED_ORIGINS: list[str] = [
         "*"
-        # "http://*",  
+        # "http://*",
         # "http://localhost:3000",  # React default port
         # "http://0.0.0.0:3000",
         # "http://127.0.0.1:3000",  # React docker port
@@ -42,6 +202,7 @@ class BackendBaseSettings(BaseSettings):
     ]
     ALLOWED_METHODS: list[str] = ["*"]
     ALLOWED_HEADERS: list[str] = ["*"]
+    EXPOSED_HEADERS: list[str] = ["ETag", "X-Request-ID"]
 
     class Config:
         env_file = f"{ROOT_DIR}/.env"
@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from redis.exceptions import RedisError
+
+from app.config.logs.logger import logger
+from app.core.database import redis
+
+# Marks a cache miss, so that None can be cached as a regular value
+MISSING = object()
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry expiration
+
+    Every worker process has its own instance, so entries should either live
+    shortly or be invalidated by the same process that changes the data.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        # Evict the least recently used entries
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def delete_matching(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """Removes the entries for which predicate(key, value) is true"""
+        for key in [
+            key for key, (_, value) in self._entries.items() if predicate(key, value)
+        ]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+async def cache_get(key: str) -> Optional[str]:
+    """Reads a value from Redis, treating an unavailable Redis as a cache miss"""
+    try:
+        return await redis.get(key)
+    except RedisError as error:
+        logger.warning(f'Unable to read "{key}" from the cache: {error}')
+        return None
+
+
+async def cache_set(key: str, value: str, ttl: int) -> None:
+    try:
+        await redis.set(key, value, ex=ttl)
+    except RedisError as error:
+        logger.warning(f'Unable to write "{key}" to the cache: {error}')
+
+
+async def cache_delete(*keys: str) -> None:
+    try:
+        await redis.delete(*keys)
+    except RedisError as error:
+        logger.warning(f"Unable to delete {keys} from the cache: {error}")
+
+
+async def delete_cached(local_cache: LocalCache, *keys: str) -> None:
+    """Removes the keys from both the worker cache and Redis"""
+    for key in keys:
+        local_cache.delete(key)
+    if keys:
+        await cache_delete(*keys)
@@ -1,17 +1,162 @@
+import time
+from typing import Any, Optional
+from uuid import uuid4
+
 import redis.asyncio as rd
-from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from redis.asyncio.client import Pipeline
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncAttrs,
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, ORMExecuteState, Session
 
 from app.config.settings.base import settings
+from app.core.metrics import instrument_pool, redis_command_duration
+from app.core.request_metrics import count_redis_call, setup_query_metrics
+from app.core.sql_logging import setup_sql_logging
+from app.core.tracing import instrument_engine, tracer
 
 DATABASE_URL: str = f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+REPLICA_DATABASE_URL: str = f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_REPLICA_HOST}:{settings.POSTGRES_REPLICA_PORT}/{settings.POSTGRES_DB}"
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        # The whole pipeline is a single round trip
+        count_redis_call()
+        span = tracer.start_span(
+            "redis PIPELINE", {"redis.commands": len(self)}, child_only=True
+        )
+        started_at = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        except BaseException as error:
+            span.record_error(error)
+            raise
+        finally:
+            tracer.end_span(span)
+            redis_command_duration.labels("PIPELINE").observe(
+                time.perf_counter() - started_at
+            )
+
+
+class InstrumentedRedis(rd.Redis):
+    """Redis client that counts the calls of the current request and measures
+    their latency"""
 
-redis = rd.from_url(settings.REDIS_URL, decode_responses=True, encoding="utf-8", db=0)
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        count_redis_call()
+        command = str(args[0]).upper()
+        span = tracer.start_span(f"redis {command}", child_only=True)
+        started_at = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        except BaseException as error:
+            span.record_error(error)
+            raise
+        finally:
+            tracer.end_span(span)
+            redis_command_duration.labels(command).observe(
+                time.perf_counter() - started_at
+            )
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: Optional[str] = None
+    ) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+redis = InstrumentedRedis.from_url(
+    settings.REDIS_URL, decode_responses=True, encoding="utf-8", db=0
+)
 
 
 class Base(AsyncAttrs, DeclarativeBase):
     pass
 
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+def get_connect_args() -> dict[str, Any]:
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer in transaction mode may run the statements of one session on
+        # different server connections, so prepared statements can't be cached
+        # and their names have to be unique
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def create_engine(url: str, pool_name: str) -> AsyncEngine:
+    new_engine = create_async_engine(
+        url,
+        echo=settings.SQL_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=get_connect_args(),
+    )
+    setup_sql_logging(
+        new_engine,
+        slow_query_threshold=settings.SQL_SLOW_QUERY_THRESHOLD,
+        sample_rate=settings.SQL_TIMING_SAMPLE_RATE,
+        max_statement_length=settings.SQL_LOG_MAX_LENGTH,
+    )
+    setup_query_metrics(new_engine, settings.N_PLUS_ONE_THRESHOLD)
+    instrument_pool(new_engine, pool_name)
+    instrument_engine(new_engine)
+    return new_engine
+
+
+class PrimarySession(Session):
+    """Session of the primary database that remembers whether it has written
+    anything, so that the following reads of the request see those writes"""
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _mark_flush(session: Session, flush_context: Any) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _mark_write_statement(orm_execute_state: ORMExecuteState) -> None:
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["has_writes"] = True
+
+
+engine = create_engine(DATABASE_URL, "primary")
+async_session_maker = async_sessionmaker(
+    engine, expire_on_commit=False, sync_session_class=PrimarySession
+)
+
+replica_engine: Optional[AsyncEngine] = (
+    create_engine(REPLICA_DATABASE_URL, "replica")
+    if settings.POSTGRES_REPLICA_HOST
+    else None
+)
+# The reads of a request share a replica transaction, repeatable read gives them
+# the same snapshot
+replica_session_maker: Optional[async_sessionmaker] = (
+    async_sessionmaker(
+        replica_engine.execution_options(isolation_level="REPEATABLE READ"),
+        expire_on_commit=False,
+    )
+    if replica_engine is not None
+    else None
+)
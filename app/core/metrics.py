@@ -0,0 +1,141 @@
+import os
+import time
+from typing import Any
+
+from celery.signals import before_task_publish
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# With PROMETHEUS_MULTIPROC_DIR set (e.g. under gunicorn) every worker writes its
+# values to the directory and the scraped worker aggregates all of them
+MULTIPROCESS_MODE = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time spent processing the request",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "Requests being processed",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections taken from the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow_connections",
+    "Connections opened beyond the pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+redis_command_duration = Histogram(
+    "redis_command_duration_seconds",
+    "Round trip time of the Redis commands",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+celery_tasks_enqueued = Counter(
+    "celery_tasks_enqueued", "Tasks sent to the Celery broker", ["task"]
+)
+# The "pool" label is "regular" for the requests and "bulk" for the imports
+password_hashing_in_progress = Gauge(
+    "password_hashing_in_progress",
+    "Passwords being hashed or verified",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+password_hashing_queue_depth = Gauge(
+    "password_hashing_queue_depth",
+    "Passwords waiting for a hashing worker",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+password_hashing_completed = Counter(
+    "password_hashing_completed", "Passwords hashed or verified successfully", ["pool"]
+)
+password_hashing_rejected = Counter(
+    "password_hashing_rejected",
+    "Passwords rejected because of a full hashing queue",
+    ["pool"],
+)
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """Returns the metrics of all the workers and their content type"""
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def instrument_pool(engine: AsyncEngine, pool_name: str) -> None:
+    """Keeps the pool gauges up to date on every checkout and checkin, so that
+    each worker reports its own pool"""
+    pool = engine.sync_engine.pool
+
+    def _update_gauges(*args: Any) -> None:
+        db_pool_checked_out.labels(pool_name).set(pool.checkedout())
+        db_pool_overflow.labels(pool_name).set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", _update_gauges)
+    event.listen(pool, "checkin", _update_gauges)
+
+
+@before_task_publish.connect
+def _count_enqueued_task(sender: str = None, **kwargs: Any) -> None:
+    celery_tasks_enqueued.labels(sender).inc()
+
+
+class PrometheusMiddleware:
+    """Measures the latency of every route and the number of requests in flight"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = http_requests_in_progress.labels(method)
+        in_progress.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+
+            # Route templates keep the label values bounded, unknown paths share one
+            route = scope.get("route")
+            http_request_duration.labels(
+                method, getattr(route, "path", "unmatched"), str(status_code)
+            ).observe(time.perf_counter() - started_at)
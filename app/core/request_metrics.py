@@ -0,0 +1,173 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.logs.logger import logger
+from app.config.settings.base import settings
+from app.core.sql_logging import shorten_statement
+
+_START_TIMES_KEY = "request_metrics_start_times"
+
+
+@dataclass
+class RequestMetrics:
+    method: str
+    path: str
+    queries: int = 0
+    db_time: float = 0
+    redis_calls: int = 0
+    statements: Counter = field(default_factory=Counter)
+    started_at: float = field(default_factory=time.perf_counter)
+    duration: float = 0
+
+    def as_log_fields(self) -> dict[str, Any]:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": round(self.duration, 1),
+            "db_queries": self.queries,
+            "db_time_ms": round(self.db_time, 1),
+            "redis_calls": self.redis_calls,
+        }
+
+
+_current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "request_metrics", default=None
+)
+
+# Callbacks that receive the metrics of every finished request (see query_budget)
+_observers: list[Callable[[RequestMetrics], None]] = []
+
+
+def get_request_metrics() -> Optional[RequestMetrics]:
+    return _current_metrics.get()
+
+
+def count_redis_call() -> None:
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.redis_calls += 1
+
+
+def setup_query_metrics(engine: AsyncEngine, n_plus_one_threshold: int) -> None:
+    """Counts the statements and the database time of the current request and
+    warns when the same statement is repeated 'n_plus_one_threshold' times"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn: Connection, *args: Any) -> None:
+        if _current_metrics.get() is not None:
+            conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _count_query(conn: Connection, cursor: Any, statement: str, *args: Any) -> None:
+        metrics = _current_metrics.get()
+        start_times = conn.info.get(_START_TIMES_KEY)
+        if metrics is None or not start_times:
+            return
+
+        metrics.queries += 1
+        metrics.db_time += (time.perf_counter() - start_times.pop()) * 1000
+
+        # Statements are parameterized, so a loop of lookups repeats the same text
+        metrics.statements[statement] += 1
+        if metrics.statements[statement] == n_plus_one_threshold > 0:
+            logger.warning(
+                f"Possible N+1 query in {metrics.method} {metrics.path}, the "
+                f"statement was executed {n_plus_one_threshold} times: "
+                f"{shorten_statement(statement, settings.SQL_LOG_MAX_LENGTH)}"
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _stop_timer(context: ExceptionContext) -> None:
+        if context.connection is not None and context.execution_context is not None:
+            start_times = context.connection.info.get(_START_TIMES_KEY)
+            if start_times:
+                start_times.pop()
+
+
+class RequestMetricsMiddleware:
+    """Collects the query and Redis metrics of every request, logs them and, in
+    debug, returns them in the X-DB-Queries, X-DB-Time and X-Redis-Calls headers"""
+
+    def __init__(self, app: ASGIApp, expose_headers: bool = False) -> None:
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics(method=scope["method"], path=scope["path"])
+
+        async def send_with_metrics(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Queries", str(metrics.queries))
+                headers.append("X-DB-Time", f"{metrics.db_time:.1f}")
+                headers.append("X-Redis-Calls", str(metrics.redis_calls))
+            await send(message)
+
+        token = _current_metrics.set(metrics)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current_metrics.reset(token)
+            metrics.duration = (time.perf_counter() - metrics.started_at) * 1000
+
+            fields = metrics.as_log_fields()
+            logger.info(
+                f"{metrics.method} {metrics.path}: {metrics.queries} queries "
+                f"({fields['db_time_ms']} ms), {metrics.redis_calls} Redis calls "
+                f"in {fields['duration_ms']} ms",
+                extra=fields,
+            )
+            for observer in _observers:
+                observer(metrics)
+
+
+@contextmanager
+def query_budget(
+    max_queries: int, max_redis_calls: Optional[int] = None
+) -> Iterator[list[RequestMetrics]]:
+    """Asserts that every request handled inside the block stays within the
+    budget, e.g. in a test:
+
+        with query_budget(max_queries=4, max_redis_calls=2):
+            client.get(f"/companies/{company_id}/")
+
+    Yields the list of the collected request metrics
+    """
+    collected: list[RequestMetrics] = []
+    observer = collected.append
+    _observers.append(observer)
+    try:
+        yield collected
+    finally:
+        _observers.remove(observer)
+
+    for metrics in collected:
+        repeated = [
+            f"  {count}x {shorten_statement(statement, 200)}"
+            for statement, count in metrics.statements.most_common()
+            if count > 1
+        ]
+        details = "\n".join(repeated)
+        assert metrics.queries <= max_queries, (
+            f"{metrics.method} {metrics.path} executed {metrics.queries} queries, "
+            f"the budget is {max_queries}\n{details}"
+        )
+        assert max_redis_calls is None or metrics.redis_calls <= max_redis_calls, (
+            f"{metrics.method} {metrics.path} made {metrics.redis_calls} Redis "
+            f"calls, the budget is {max_redis_calls}"
+        )
@@ -0,0 +1,63 @@
+import random
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.logs.logger import logger
+
+_START_TIMES_KEY = "query_start_times"
+
+
+def shorten_statement(statement: str, max_length: int) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > max_length:
+        return statement[:max_length] + "..."
+    return statement
+
+
+def setup_sql_logging(
+    engine: AsyncEngine,
+    slow_query_threshold: int,
+    sample_rate: float,
+    max_statement_length: int = 1000,
+) -> None:
+    """Logs the statements slower than 'slow_query_threshold' (in milliseconds)
+    and the timing of the 'sample_rate' share of the rest of them.
+
+    Statement parameters are never logged, so that the log volume doesn't depend
+    on the data size
+    """
+    if slow_query_threshold <= 0 and sample_rate <= 0:
+        return
+
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn: Connection, *args: Any) -> None:
+        conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _log_query(conn: Connection, cursor: Any, statement: str, *args: Any) -> None:
+        duration = (time.perf_counter() - conn.info[_START_TIMES_KEY].pop()) * 1000
+
+        if 0 < slow_query_threshold <= duration:
+            logger.warning(
+                f"Slow query ({duration:.1f} ms): "
+                f"{shorten_statement(statement, max_statement_length)}"
+            )
+        elif sample_rate > 0 and random.random() < sample_rate:
+            logger.info(
+                f"Query took {duration:.1f} ms: "
+                f"{shorten_statement(statement, max_statement_length)}"
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _stop_timer(context: ExceptionContext) -> None:
+        # Failed statements don't reach 'after_cursor_execute'
+        if context.connection is not None and context.execution_context is not None:
+            start_times = context.connection.info.get(_START_TIMES_KEY)
+            if start_times:
+                start_times.pop()
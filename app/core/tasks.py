@@ -1,12 +1,19 @@
+import asyncio
 import smtplib
 from email.message import EmailMessage
 
 from celery import Celery
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
+from app.config.logs.logger import logger
 from app.config.settings.base import settings
+from app.core.database import DATABASE_URL, get_connect_args
+from app.core.tracing import instrument_celery
 
 celery = Celery("tasks", broker=settings.REDIS_URL)
+instrument_celery()
 
 
 def get_email_template_dashboard(user_email: EmailStr, user_name: str, reset_link: str):
@@ -33,3 +40,33 @@ def send_email_report_dashboard(user_email: EmailStr, user_name: str, reset_link
     with smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT) as server:
         server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
         server.send_message(email)
+
+
+async def _reconcile_company_staff_counts() -> int:
+    from app.repository.company import CompanyRepository
+
+    # Every task runs its own event loop, so pooled connections can't be reused
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool, connect_args=get_connect_args()
+    )
+    try:
+        async with async_sessionmaker(engine)() as session:
+            return await CompanyRepository(session).reconcile_staff_counts()
+    finally:
+        await engine.dispose()
+
+
+@celery.task
+def reconcile_company_staff_counts() -> int:
+    fixed_count = asyncio.run(_reconcile_company_staff_counts())
+    if fixed_count:
+        logger.warning(f"Fixed staff counters of {fixed_count} companies")
+    return fixed_count
+
+
+celery.conf.beat_schedule = {
+    "reconcile-company-staff-counts": {
+        "task": reconcile_company_staff_counts.name,
+        "schedule": settings.STAFF_COUNT_RECONCILE_INTERVAL,
+    },
+}
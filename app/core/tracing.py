@@ -0,0 +1,482 @@
+import atexit
+import functools
+import inspect
+import json
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterator, Optional, TextIO, TypeVar
+
+from celery.signals import (
+    after_task_publish,
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.logs.logger import logger
+from app.config.settings.base import settings
+from app.core.request_id import request_id
+from app.core.sql_logging import shorten_statement
+
+AsyncFunction = TypeVar("AsyncFunction", bound=Callable[..., Awaitable[Any]])
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+_SPANS_KEY = "tracing_spans"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifies the span in another process (W3C trace context)"""
+
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, traceparent: Optional[str]) -> Optional["SpanContext"]:
+        match = _TRACEPARENT.fullmatch(traceparent or "")
+        if not match:
+            return None
+
+        trace_id, span_id, flags = match.groups()
+        return cls(trace_id, span_id, sampled=bool(int(flags, 16) & 1))
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start_time: float = field(default_factory=time.time)
+    duration: float = 0
+    status: str = "ok"
+    error: Optional[str] = None
+    # Spans of the trace finished in this process, exported with the local root
+    trace_spans: list["Span"] = field(default_factory=list, repr=False)
+    is_local_root: bool = False
+    _started_at: float = field(default_factory=time.perf_counter, repr=False)
+
+    is_recording = True
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class NonRecordingSpan:
+    """Stands for the spans of the traces that are disabled or not sampled"""
+
+    is_recording = False
+    context = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = NonRecordingSpan()
+
+_current_span: ContextVar[Optional[Span | NonRecordingSpan]] = ContextVar(
+    "current_span", default=None
+)
+
+
+class SpanExporter(ABC):
+    """Receives the finished spans of a trace in a background thread"""
+
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        ...
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Prints every trace as a tree of spans with their durations"""
+
+    def __init__(self, stream: TextIO = sys.stderr) -> None:
+        self.stream = stream
+
+    def export(self, spans: list[Span]) -> None:
+        children: dict[Optional[str], list[Span]] = {}
+        span_ids = {span.span_id for span in spans}
+        for span in sorted(spans, key=lambda span: span.start_time):
+            # Spans with a remote parent are the roots of this part of the trace
+            parent_id = span.parent_id if span.parent_id in span_ids else None
+            children.setdefault(parent_id, []).append(span)
+
+        lines: list[str] = []
+
+        def add_lines(span: Span, depth: int) -> None:
+            error = f" [{span.error}]" if span.error else ""
+            lines.append(f"{'  ' * depth}{span.name} {span.duration:.2f} ms{error}")
+            for child in children.get(span.span_id, []):
+                add_lines(child, depth + 1)
+
+        for root in children.get(None, []):
+            lines.append(f"Trace {root.trace_id}")
+            add_lines(root, 1)
+
+        self.stream.write("\n".join(lines) + "\n")
+        self.stream.flush()
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends the spans to a file, one JSON object per line"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def export(self, spans: list[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            for span in spans:
+                file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+EXPORTERS: dict[str, Callable[[], SpanExporter]] = {
+    "console": ConsoleSpanExporter,
+    "file": lambda: FileSpanExporter(settings.TRACING_FILE),
+}
+
+
+class Tracer:
+    """Creates the spans and hands the finished traces over to the exporter
+
+    Exporting happens in a background thread, so that the traced code never
+    waits for the exporter I/O.
+    """
+
+    def __init__(self, enabled: bool, sample_rate: float) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporter: Optional[SpanExporter] = None
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def set_exporter(self, exporter: SpanExporter) -> None:
+        self.exporter = exporter
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+        child_only: bool = False,
+    ) -> Span | NonRecordingSpan:
+        """Starts the child of the current span, or a new trace (continuing the
+        remote 'parent' if given) unless 'child_only' is set. The span isn't made
+        current"""
+        if not self.enabled:
+            return NON_RECORDING_SPAN
+
+        current = _current_span.get()
+        if parent is None and current is None and child_only:
+            return NON_RECORDING_SPAN
+
+        if parent is None and current is not None:
+            if not current.is_recording:
+                return NON_RECORDING_SPAN
+
+            return Span(
+                name,
+                current.trace_id,
+                random_id(16),
+                current.span_id,
+                attributes=dict(attributes or {}),
+                trace_spans=current.trace_spans,
+            )
+
+        sampled = parent.sampled if parent else random.random() < self.sample_rate
+        if not sampled:
+            return NON_RECORDING_SPAN
+
+        return Span(
+            name,
+            parent.trace_id if parent else random_id(32),
+            random_id(16),
+            parent.span_id if parent else None,
+            attributes=dict(attributes or {}),
+            is_local_root=True,
+        )
+
+    def end_span(self, span: Span | NonRecordingSpan) -> None:
+        if not span.is_recording:
+            return
+
+        span.duration = (time.perf_counter() - span._started_at) * 1000
+        span.trace_spans.append(span)
+        if span.is_local_root:
+            self._export(span.trace_spans)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        attributes: Optional[dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+    ) -> Iterator[Span | NonRecordingSpan]:
+        """Runs the block in a new current span"""
+        span = self.start_span(name, attributes, parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.record_error(error)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def _export(self, spans: list[Span]) -> None:
+        if self.exporter is None:
+            return
+
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run_exporter, name="span-exporter", daemon=True
+                    )
+                    self._thread.start()
+        self._queue.put(spans)
+
+    def _run_exporter(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            try:
+                self.exporter.export(spans)
+            except Exception as error:
+                logger.warning(f"Unable to export {len(spans)} spans: {error}")
+
+    def shutdown(self) -> None:
+        """Exports the queued traces and stops the exporter thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def random_id(length: int) -> str:
+    return f"{random.getrandbits(length * 4):0{length}x}"
+
+
+def get_current_span() -> Optional[Span | NonRecordingSpan]:
+    return _current_span.get()
+
+
+def get_traceparent() -> Optional[str]:
+    """Returns the context of the current span to be sent to another process"""
+    span = _current_span.get()
+    if span is None or not span.is_recording:
+        return None
+    return span.context.to_traceparent()
+
+
+def traced(name: str) -> Callable[[AsyncFunction], AsyncFunction]:
+    """Runs every call of the coroutine function in a span"""
+
+    def decorator(func: AsyncFunction) -> AsyncFunction:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.span(name):
+                return await func(*args, **kwargs)
+
+        wrapper.__traced__ = True
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls: type) -> None:
+    """Wraps the public coroutine methods defined in the class with spans. Does
+    nothing when tracing is disabled, so that the methods don't get any overhead"""
+    if not tracer.enabled:
+        return
+
+    for name, attribute in list(vars(cls).items()):
+        if (
+            not name.startswith("_")
+            and inspect.iscoroutinefunction(attribute)
+            and not getattr(attribute, "__traced__", False)
+        ):
+            setattr(cls, name, traced(f"{cls.__name__}.{name}")(attribute))
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Records a span for every SQL statement"""
+    if not tracer.enabled:
+        return
+
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_span(conn: Connection, cursor: Any, statement: str, *args: Any) -> None:
+        span = tracer.start_span(
+            "sql",
+            {"db.statement": shorten_statement(statement, settings.SQL_LOG_MAX_LENGTH)},
+            child_only=True,
+        )
+        conn.info.setdefault(_SPANS_KEY, []).append(span)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end_span(conn: Connection, *args: Any) -> None:
+        spans = conn.info.get(_SPANS_KEY)
+        if spans:
+            tracer.end_span(spans.pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _end_failed_span(context: ExceptionContext) -> None:
+        if context.connection is not None and context.execution_context is not None:
+            spans = context.connection.info.get(_SPANS_KEY)
+            if spans:
+                span = spans.pop()
+                span.record_error(context.original_exception)
+                tracer.end_span(span)
+
+
+def instrument_celery() -> None:
+    """Traces publishing and running the Celery tasks. The trace context is sent
+    in the message headers, so that the task span continues the request trace"""
+    if not tracer.enabled:
+        return
+
+    publish_spans: dict[str, Span | NonRecordingSpan] = {}
+    task_spans: dict[str, tuple[Span | NonRecordingSpan, Any]] = {}
+
+    @before_task_publish.connect(weak=False)
+    def _start_publish_span(
+        sender: str = None, headers: Optional[dict] = None, **kwargs: Any
+    ) -> None:
+        if headers is None:
+            return
+
+        span = tracer.start_span(f"celery.enqueue {sender}")
+        if span.is_recording:
+            headers[TRACEPARENT_HEADER] = span.context.to_traceparent()
+            publish_spans[headers["id"]] = span
+
+    @after_task_publish.connect(weak=False)
+    def _end_publish_span(headers: Optional[dict] = None, **kwargs: Any) -> None:
+        span = publish_spans.pop((headers or {}).get("id"), None)
+        if span is not None:
+            tracer.end_span(span)
+
+    @task_prerun.connect(weak=False)
+    def _start_task_span(task_id: str = None, task: Any = None, **kwargs: Any) -> None:
+        traceparent = getattr(task.request, TRACEPARENT_HEADER, None) or (
+            task.request.headers or {}
+        ).get(TRACEPARENT_HEADER)
+        span = tracer.start_span(
+            f"celery.task {task.name}",
+            {"celery.task_id": task_id},
+            parent=SpanContext.from_traceparent(traceparent),
+        )
+        task_spans[task_id] = (span, _current_span.set(span))
+
+    @task_failure.connect(weak=False)
+    def _record_task_error(
+        task_id: str = None, exception: Optional[BaseException] = None, **kwargs: Any
+    ) -> None:
+        if task_id in task_spans and exception is not None:
+            task_spans[task_id][0].record_error(exception)
+
+    @task_postrun.connect(weak=False)
+    def _end_task_span(task_id: str = None, state: str = None, **kwargs: Any) -> None:
+        if task_id not in task_spans:
+            return
+
+        span, token = task_spans.pop(task_id)
+        _current_span.reset(token)
+        span.set_attribute("celery.state", state)
+        tracer.end_span(span)
+
+
+class TracingMiddleware:
+    """Traces every request, continuing the trace from the 'traceparent' header"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        parent = SpanContext.from_traceparent(
+            Headers(scope=scope).get(TRACEPARENT_HEADER)
+        )
+        with tracer.span(
+            f"{scope['method']} {scope['path']}",
+            {"http.method": scope["method"], "request_id": request_id.get()},
+            parent=parent,
+        ) as span:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None and span.is_recording:
+                    span.name = f"{scope['method']} {route.path}"
+                    span.set_attribute("http.route", route.path)
+
+
+tracer = Tracer(
+    enabled=settings.TRACING_ENABLED, sample_rate=settings.TRACING_SAMPLE_RATE
+)
+if settings.TRACING_ENABLED and settings.TRACING_EXPORTER:
+    tracer.set_exporter(EXPORTERS[settings.TRACING_EXPORTER]())
+    atexit.register(tracer.shutdown)
@@ -0,0 +1,93 @@
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.logs.logger import logger
+
+ServiceMethod = TypeVar("ServiceMethod", bound=Callable[..., Awaitable[Any]])
+
+
+class UnitOfWork:
+    """Groups the writes made through the request session into one transaction
+
+    Repositories only flush their changes while a unit of work is active, and the
+    outermost block commits them once. Nested blocks join the outer transaction.
+    Any exception rolls the whole transaction back.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self._depth: int = 0
+        self._after_commit: list[tuple[Callable[..., Any], tuple[Any, ...]]] = []
+
+    @classmethod
+    def of(cls, session: AsyncSession) -> "UnitOfWork":
+        """Returns the unit of work of the session, all repositories of a request
+        share the same one"""
+        unit_of_work = session.info.get("unit_of_work")
+        if unit_of_work is None:
+            unit_of_work = session.info["unit_of_work"] = cls(session)
+        return unit_of_work
+
+    @property
+    def is_active(self) -> bool:
+        return self._depth > 0
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self._depth += 1
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self._depth -= 1
+        if self._depth:
+            return
+
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.rollback()
+
+    async def commit(self) -> None:
+        try:
+            await self.session.commit()
+        except Exception:
+            await self.rollback()
+            raise
+
+        callbacks, self._after_commit = self._after_commit, []
+        for callback, args in callbacks:
+            await self._run(callback, args)
+
+    async def rollback(self) -> None:
+        self._after_commit.clear()
+        await self.session.rollback()
+
+    async def after_commit(self, callback: Callable[..., Any], *args: Any) -> None:
+        """Runs the callback (e.g. a cache invalidation) once the transaction is
+        committed, or right away when there is no unit of work in progress"""
+        if self.is_active:
+            self._after_commit.append((callback, args))
+        else:
+            await self._run(callback, args)
+
+    async def _run(self, callback: Callable[..., Any], args: tuple[Any, ...]) -> None:
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as error:
+            # The data is already committed, so the request shouldn't fail
+            logger.error(f'After commit callback "{callback.__qualname__}": {error}')
+
+
+def transactional(method: ServiceMethod) -> ServiceMethod:
+    """Runs the service method in the unit of work of its repositories"""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        async with self.unit_of_work:
+            return await method(self, *args, **kwargs)
+
+    return wrapper
@@ -1,21 +1,40 @@
-import logging
-import logging.config
-
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_pagination import add_pagination
 from fastapi_pagination.utils import disable_installed_extensions_check
 
 from app.api.endpoints import router
-from app.config.logs.log_config import LOGGING_CONFIG
+from app.config.logs.log_config import setup_logging
 from app.config.settings.base import settings
+from app.core.metrics import PrometheusMiddleware
+from app.core.request_id import RequestIdMiddleware
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.tracing import TracingMiddleware, tracer
+from app.securities.authorization.jwks import jwks_cache
+from app.securities.authorization.password_hasher import password_hasher
 
 # Set up logging configuration
-logging.config.dictConfig(LOGGING_CONFIG)
+log_listener = setup_logging()
 
 app = FastAPI(title="QuizApp")
 app.include_router(router)
 
+
+@app.on_event("startup")
+async def startup() -> None:
+    # Warm up Auth0 signing keys and keep them fresh
+    jwks_cache.start_background_refresh()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await jwks_cache.stop_background_refresh()
+    password_hasher.shutdown()
+    tracer.shutdown()
+    if log_listener is not None:
+        log_listener.stop()
+
+
 # Enable pagination in the app
 add_pagination(app)
 disable_installed_extensions_check()
@@ -26,4 +45,10 @@ app.add_middleware(
     allow_credentials=settings.IS_ALLOWED_CREDENTIALS,
     allow_methods=settings.ALLOWED_METHODS,
     allow_headers=settings.ALLOWED_HEADERS,
+    expose_headers=settings.EXPOSED_HEADERS,
 )
+app.add_middleware(RequestMetricsMiddleware, expose_headers=settings.DEBUG)
+app.add_middleware(PrometheusMiddleware)
+app.add_middleware(TracingMiddleware)
+# Outermost, so that every log line of the request has its id
+app.add_middleware(RequestIdMiddleware)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DECIMAL, Column, DateTime, ForeignKey, Integer, Time
+from sqlalchemy import ARRAY, DECIMAL, Column, DateTime, ForeignKey, Integer, Time
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -19,5 +19,10 @@ class Attempt(Base):
     spent_time = Column(Time)
     result = Column(DECIMAL, default=0)
 
+    # Ids of the questions sampled from the quiz pool for this attempt
+    question_ids = Column(
+        ARRAY(Integer), nullable=False, default=[], server_default="{}"
+    )
+
     def __repr__(self) -> str:
         return f"Attempt for quiz {self.quiz_id}"
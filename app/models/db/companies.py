@@ -23,6 +23,12 @@ class Company(Base):
     description = Column(String, nullable=True)
     created_at = Column(TIMESTAMP, default=datetime.utcnow())
 
+    # Incremented on every change of the company page data (used for ETags)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Maintained along with the 'company_user' rows (see CompanyRepository)
+    staff_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     users = relationship("CompanyUser", back_populates="companies", lazy="select")
 
     def __repr__(self) -> str:
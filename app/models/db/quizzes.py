@@ -1,6 +1,7 @@
 import enum
 
 from sqlalchemy import (
+    ARRAY,
     Boolean,
     Column,
     Enum,
@@ -10,7 +11,7 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.core.database import Base
 
@@ -34,6 +35,16 @@ class Quiz(Base):
     completion_time = Column(Integer, nullable=False)
     max_attempts_count = Column(Integer, nullable=True, default=1)
 
+    # Question pool: amount of questions drawn for each attempt (all if None)
+    # and precomputed ids of all quiz questions to sample them from
+    questions_per_attempt = Column(Integer, nullable=True)
+    question_ids = deferred(
+        Column(ARRAY(Integer), nullable=False, default=[], server_default="{}")
+    )
+
+    # Incremented on every change of the quiz data (used for ETags)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     # Deadlines
     start_date = Column(String, nullable=False)
     end_date = Column(String, nullable=False)
@@ -6,6 +6,7 @@ from sqlalchemy import (
     Boolean,
     Column,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
@@ -31,6 +32,17 @@ class User(Base):
     tags = relationship("TagUser", back_populates="users", lazy="select")
     attempts = relationship("Attempt", back_populates="user", lazy="select")
 
+    # Trigram indexes serve the substring (ILIKE '%...%') search of the members
+    __table_args__ = tuple(
+        Index(
+            f"ix_users_{column}_trgm",
+            column,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+        for column in ["name", "email", "phone_number"]
+    )
+
     def __repr__(self):
         return f"User {self.email}"
 
@@ -61,6 +73,9 @@ class TagUser(Base):
     users = relationship("User", back_populates="tags", lazy="joined")
     tags = relationship("Tag", back_populates="users", lazy="joined")
 
+    # Primary key index starts with 'tag_id', so the user lookups need their own
+    __table_args__ = (Index("ix_tag_user_user_id", "user_id"),)
+
     def __repr__(self):
         return f"TagUser object for tag {self.tag_id} and user {self.user_id}"
 
@@ -74,5 +89,8 @@ class TagQuiz(Base):
     quizzes = relationship("Quiz", back_populates="tags", lazy="joined")
     tags = relationship("Tag", back_populates="quizzes", lazy="joined")
 
+    # Primary key index starts with 'tag_id', so the quiz lookups need their own
+    __table_args__ = (Index("ix_tag_quiz_quiz_id", "quiz_id"),)
+
     def __repr__(self):
         return f"TagQuiz object for tag {self.tag_id} and quiz {self.quiz_id}"
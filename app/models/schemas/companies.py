@@ -56,6 +56,15 @@ class CompanyUsers(BaseModel):
         from_attributes = True
 
 
+class CompanyUsersSearchResult(CompanyUsers):
+    score: float
+
+
+class CompanyUsersPage(BaseModel):
+    users: list[CompanyUsersSearchResult]
+    next_cursor: Optional[str] = None
+
+
 class UserCompanies(BaseModel):
     id: int
     title: str
@@ -1,9 +1,8 @@
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import EmailStr
-from sqlalchemy.exc import MissingGreenlet
 
-from app.models.db.companies import Company
+from app.models.db.companies import RoleEnum
 from app.models.db.users import User
 from app.models.schemas.companies import CompanySchema, CompanyUsers, UserCompanies
 from app.models.schemas.users import TagBaseSchema, UserSchema
@@ -44,44 +43,25 @@ class CompanyFullSchema(CompanySchema):
     users: list[CompanyUsers]
 
     @classmethod
-    def _initialize_schema_instance(
-        cls,
-        company_instance: Company,
-        staff_count: int,
-        owner_instance: User,
-        users: Optional[list[User]],
-    ):
+    def from_details(cls, details: dict[str, Any]):
+        # Members are aggregated to JSON, so roles come as the enum names
         return cls(
-            id=company_instance.id,
-            title=company_instance.title,
-            description=company_instance.description,
-            staff_count=staff_count,
-            created_at=company_instance.created_at,
-            owner_email=owner_instance.email,
-            owner_phone=owner_instance.phone_number,
-            owner_name=owner_instance.name,
+            id=details["id"],
+            title=details["title"],
+            description=details["description"],
+            staff_count=details["staff_count"],
+            created_at=details["created_at"],
+            owner_email=details["owner_email"],
+            owner_phone=details["owner_phone"],
+            owner_name=details["owner_name"],
             users=[
                 CompanyUsers(
-                    id=user.users.id,
-                    name=user.users.name,
-                    phone_number=user.users.phone_number,
-                    email=user.users.email,
-                    role=user.role,
+                    id=user["id"],
+                    name=user["name"],
+                    phone_number=user["phone_number"],
+                    email=user["email"],
+                    role=RoleEnum[user["role"]],
                 )
-                for user in users
+                for user in details["users"]
             ],
         )
-
-    @classmethod
-    def from_model(
-        cls, company_instance: Company, staff_count: int, owner_instance: User
-    ):
-        # Validate if Company's users field is empty
-        try:
-            return cls._initialize_schema_instance(
-                company_instance, staff_count, owner_instance, company_instance.users
-            )
-        except MissingGreenlet:
-            return cls._initialize_schema_instance(
-                company_instance, staff_count, owner_instance, []
-            )
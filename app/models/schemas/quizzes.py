@@ -3,7 +3,7 @@ from typing import Annotated, Optional
 from annotated_types import Gt
 from pydantic import BaseModel, field_validator
 
-from app.models.db.quizzes import QuestionTypeEnum, Quiz
+from app.models.db.quizzes import Question, QuestionTypeEnum, Quiz
 from app.models.schemas.tags import TagBaseSchema
 from app.utilities.validators.payload.datetime import (
     validate_date_format,
@@ -71,6 +71,7 @@ class QuizBase(BaseModel):
     description: str
     completion_time: Annotated[int, Gt(0)]
     max_attempts_count: Annotated[int, Gt(0)]
+    questions_per_attempt: Optional[Annotated[int, Gt(0)]] = None
     start_date: str
     start_time: str
     end_date: str
@@ -112,6 +113,7 @@ class QuizBase(BaseModel):
             title=quiz_instance.title,
             description=quiz_instance.description,
             max_attempts_count=quiz_instance.max_attempts_count,
+            questions_per_attempt=quiz_instance.questions_per_attempt,
             completion_time=quiz_instance.completion_time,
             start_date=quiz_instance.start_date,
             start_time=quiz_instance.start_time,
@@ -235,7 +237,7 @@ class QuizAttemptSchema(BaseModel):
     questions: list[QuestionAttemptSchema]
 
     @classmethod
-    def from_model(cls, quiz_instance: Quiz):
+    def from_model(cls, quiz_instance: Quiz, questions: list[Question]):
         return cls(
             id=quiz_instance.id,
             completion_time=quiz_instance.completion_time,
@@ -254,7 +256,7 @@ class QuizAttemptSchema(BaseModel):
                         for answer in question.answers
                     ],
                 )
-                for question in quiz_instance.questions
+                for question in questions
             ],
         )
 
@@ -263,8 +265,10 @@ class StartAttemptResponse(QuizAttemptSchema):
     attempt_id: int
 
     @classmethod
-    def from_model(cls, attempt_id: int, quiz_instance: Quiz):
+    def from_model(
+        cls, attempt_id: int, quiz_instance: Quiz, questions: list[Question]
+    ):
         return cls(
             attempt_id=attempt_id,
-            **QuizAttemptSchema.from_model(quiz_instance).model_dump(),
+            **QuizAttemptSchema.from_model(quiz_instance, questions).model_dump(),
         )
@@ -60,3 +60,11 @@ class TagUpdateInput(BaseModel):
     @classmethod
     def validate_tag_title(cls, value):
         return validate_text(value, "title")
+
+
+class TagAssignmentInput(BaseModel):
+    ids: list[int] = Field(min_length=1)
+
+
+class TagAssignmentOutput(BaseModel):
+    affected: int
@@ -39,6 +39,31 @@ class CompanyMemberInput(UserBase):
         return validate_password(value)
 
 
+class CompanyMembersBulkUpdate(BaseModel):
+    member_ids: list[int] = Field(min_length=1)
+    role: Optional[str] = None
+    add_tags: Optional[list[int]] = None
+    remove_tags: Optional[list[int]] = None
+    replace_tags: Optional[list[int]] = None
+
+
+class CompanyMembersBulkUpdateOutput(BaseModel):
+    updated: int
+
+
+class MemberImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    message: str
+    field: Optional[str] = None
+
+
+class MemberImportReport(BaseModel):
+    created: int
+    failed: int
+    errors: list[MemberImportError]
+
+
 class CompanyMemberUpdate(BaseModel):
     role: Optional[str] = None
     tags: Optional[list[int]] = None
@@ -2,33 +2,32 @@ import json
 from datetime import datetime, time, timedelta
 from typing import Any
 
-from sqlalchemy import func, select
+from sqlalchemy import bindparam, func, select
 
-from app.config.logs.logger import logger
+from app.config.logs.logger import log_arguments
 from app.core.database import redis
 from app.models.db.attempts import Attempt
 from app.models.db.quizzes import Quiz
 from app.repository.base import BaseRepository
-from app.utilities.formatters.get_args import get_args
+
+_ATTEMPT_BY_ID = select(Attempt).where(Attempt.id == bindparam("attempt_id"))
 
 
 class AttemptRepository(BaseRepository):
     model = Attempt
 
+    @log_arguments
     async def get_attempts_count(self, user_id: int, quiz_id: int) -> int:
-        logger.debug(f"Received data:\n{get_args()}")
-
         query = select(func.count(Attempt.id)).where(
             (Attempt.user_id == user_id) & (Attempt.quiz_id == quiz_id)
         )
         result = await self.get_many(query)
         return self.unpack(result)[0]
 
+    @log_arguments
     async def has_ongoing_attempt(
         self, user_id: int, quiz_id: int, quiz_completion_time: int
     ) -> bool:
-        logger.debug(f"Received data:\n{get_args()}")
-
         query = select(Attempt).where(
             (Attempt.user_id == user_id)
             & (Attempt.quiz_id == quiz_id)
@@ -43,9 +42,10 @@ class AttemptRepository(BaseRepository):
 
         return False
 
-    async def create_attempt(self, user_id: int, quiz_data: Quiz) -> int:
-        logger.debug(f"Received data:\n{get_args()}")
-
+    @log_arguments
+    async def create_attempt(
+        self, user_id: int, quiz_data: Quiz, question_ids: list[int]
+    ) -> int:
         start_time = datetime.utcnow()
         end_time = start_time + timedelta(minutes=quiz_data.completion_time)
         new_attempt = Attempt(
@@ -54,32 +54,39 @@ class AttemptRepository(BaseRepository):
             start_time=start_time,
             end_time=end_time,
             spent_time=time(0, quiz_data.completion_time, 0),
+            question_ids=question_ids,
         )
 
         await self.save(new_attempt)
         return new_attempt.id
 
+    @log_arguments
     async def get_attempt_data(self, attempt_id: int) -> Attempt:
-        logger.debug(f"Received data:\n{get_args()}")
-
-        query = select(Attempt).where(Attempt.id == attempt_id)
-        return await self.get_instance(query)
+        return await self.get_instance(_ATTEMPT_BY_ID, {"attempt_id": attempt_id})
 
+    @log_arguments
     async def store_answers(
         self, attempt_data, question_id, answers: list[str] | list[int]
     ) -> None:
-        logger.debug(f"Received data:\n{get_args()}")
-
         key = f"{attempt_data.id}:{question_id}"
         await redis.set(key, json.dumps([answer for answer in answers]), ex=86400)
 
-    async def get_redis_answers(self, attempt_id) -> dict[str, Any]:
-        answers_keys: list[str] = await redis.keys(f"{attempt_id}*")
+    async def get_redis_answers(
+        self, attempt_id: int, question_ids: list[int]
+    ) -> dict[str, Any]:
+        answers_keys: list[str] = [
+            f"{attempt_id}:{question_id}" for question_id in question_ids
+        ]
+        if not answers_keys:
+            return {}
 
-        # Gather questions and answers to be able to count result
+        # Gather answered questions and their answers to be able to count result
         answers_values: dict[str, Any] = {
-            key.split(":")[1]: answers
-            for key, answers in zip(answers_keys, await redis.mget(answers_keys))
+            str(question_id): answers
+            for question_id, answers in zip(
+                question_ids, await redis.mget(answers_keys)
+            )
+            if answers
         }
 
         return answers_values
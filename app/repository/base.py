@@ -1,21 +1,52 @@
 from itertools import chain
-from typing import Any, Iterable, Type
+from typing import Any, Iterable, Optional, Type
 
 from pydantic import BaseModel
-from sqlalchemy import delete, select, update
+from sqlalchemy import bindparam, delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import Select
 
-from app.config.logs.logger import logger
+from app.config.logs.logger import log_arguments
 from app.core.database import Base
-from app.utilities.formatters.get_args import get_args
+from app.core.tracing import trace_methods
+from app.core.unit_of_work import UnitOfWork
+from app.repository.routing import routed_session
 
 
 class BaseRepository:
     model: Any = None
 
+    # Hot statements are built once, so that every call only binds the parameters
+    # and hits the compiled cache without generating a new cache key
+    _exists_by_id_query: Optional[Select] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls)
+        if cls.model is not None:
+            cls._exists_by_id_query = select(cls.model.id).where(
+                cls.model.id == bindparam("instance_id")
+            )
+
     def __init__(self, async_session: AsyncSession):
-        self.async_session = async_session
+        self.primary_session = async_session
+
+    @property
+    def async_session(self) -> AsyncSession:
+        """Session of the replica inside read-only methods, the primary otherwise"""
+        return routed_session.get() or self.primary_session
+
+    @property
+    def unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork.of(self.primary_session)
+
+    async def _commit(self) -> None:
+        """Flushes the changes when they are a part of a unit of work, commits
+        them otherwise"""
+        if self.unit_of_work.is_active:
+            await self.primary_session.flush()
+        else:
+            await self.unit_of_work.commit()
 
     def unpack(self, collection: Iterable) -> list:
         return list(chain.from_iterable(collection))
@@ -24,7 +55,7 @@ class BaseRepository:
         new_instance = self.model(**model_data.model_dump())
         self.async_session.add(new_instance)
 
-        await self.async_session.commit()
+        await self._commit()
         return new_instance
 
     async def exists(self, query: Select) -> bool:
@@ -34,39 +65,63 @@ class BaseRepository:
         result = response.first()
         return bool(result)
 
+    @log_arguments
     async def exists_by_id(self, instance_id: int) -> bool:
-        logger.debug(f"Received data:\n{get_args()}")
-
-        query = select(self.model).where(self.model.id == instance_id)
-        return await self.exists(query)
+        response = await self.async_session.execute(
+            self._exists_by_id_query, {"instance_id": instance_id}
+        )
+        return bool(response.first())
 
-    async def get_many(self, query: Select) -> list[Any]:
-        response = await self.async_session.execute(query)
+    async def get_many(
+        self, query: Select, params: Optional[dict[str, Any]] = None
+    ) -> list[Any]:
+        response = await self.async_session.execute(query, params)
         result = response.unique().all()
         return result
 
-    async def get_instance(self, query: Select) -> Base:
-        response = await self.async_session.execute(query)
+    async def get_instance(
+        self, query: Select, params: Optional[dict[str, Any]] = None
+    ) -> Base:
+        response = await self.async_session.execute(query, params)
         result = response.unique().scalar_one_or_none()
         return result
 
-    async def update(self, instance_id: int, model_data: Type[BaseModel]) -> Type[Base]:
+    async def update(
+        self,
+        instance_id: int,
+        model_data: Type[BaseModel],
+        clear_fields: Iterable[str] = (),
+    ) -> Type[Base]:
+        values: dict[str, Any] = {
+            key: value
+            for key, value in model_data.model_dump().items()
+            if value is not None
+        }
+        # None values are skipped, the cleared fields are set to NULL explicitly
+        values.update(dict.fromkeys(clear_fields))
+        # Versioned models get a new version on every update
+        if hasattr(self.model, "version"):
+            values["version"] = self.model.version + 1
+
         query = (
             update(self.model)
             .where(self.model.id == instance_id)
-            .values(
-                {
-                    key: value
-                    for key, value in model_data.model_dump().items()
-                    if value is not None
-                }
-            )
+            .values(values)
             .returning(self.model)
         )
         res = await self.async_session.execute(query)
-        await self.async_session.commit()
+        await self._commit()
         return res.unique().scalar_one()
 
+    async def bump_version(self, instance_id: int) -> None:
+        query = (
+            update(self.model)
+            .where(self.model.id == instance_id)
+            .values(version=self.model.version + 1)
+        )
+        await self.async_session.execute(query)
+        await self._commit()
+
     async def delete(self, instance_id: int) -> int:
         query = (
             delete(self.model)
@@ -75,14 +130,17 @@ class BaseRepository:
         )
 
         result = (await self.async_session.execute(query)).scalar_one()
-        await self.async_session.commit()
+        await self._commit()
         return result
 
     async def save(self, obj: Any):
         self.async_session.add(obj)
-        await self.async_session.commit()
+        await self._commit()
 
     async def save_many(self, objects: list[Any]):
         self.async_session.add_all(objects)
-        await self.async_session.commit()
+        await self._commit()
         self.async_session.expire_all()
+
+
+trace_methods(BaseRepository)
@@ -1,41 +1,180 @@
-from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Optional
 
-from sqlalchemy import select
-from sqlalchemy.orm import contains_eager
+from sqlalchemy import (
+    Numeric,
+    bindparam,
+    cast,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from app.config.logs.logger import logger
+from app.config.logs.logger import log_arguments, logger
+from app.config.settings.base import settings
+from app.core.cache import MISSING, LocalCache, cache_get, cache_set, delete_cached
 from app.models.db.companies import Company, CompanyUser, RoleEnum
-from app.models.db.users import User
+from app.models.db.users import Tag, TagUser, User
 from app.models.schemas.companies import CompanyCreate, CompanyUpdate
 from app.repository.base import BaseRepository
-from app.utilities.formatters.get_args import get_args
+from app.repository.routing import read_only
+from app.securities.authorization.identity_cache import identity_cache
 
+# Roles of the users resolved by this worker (None for non-members)
+member_roles_cache = LocalCache(
+    max_size=settings.MEMBERSHIP_LOCAL_CACHE_SIZE,
+    ttl=settings.MEMBERSHIP_LOCAL_CACHE_TTL,
+)
 
-@dataclass
-class CompanyMember:
-    id: int
-    role: RoleEnum
+
+_MEMBER_ROLE = select(CompanyUser.role).where(
+    (CompanyUser.company_id == bindparam("company_id"))
+    & (CompanyUser.user_id == bindparam("user_id"))
+)
+
+
+def _member_role_key(company_id: int, user_id: int) -> str:
+    return f"company:{company_id}:member:{user_id}:role"
 
 
 class CompanyRepository(BaseRepository):
     model = Company
 
+    @log_arguments
     async def create_company(
         self, company_data: CompanyCreate, current_user: User
     ) -> int:
-        logger.debug(f"Received data:\n{get_args()}")
-
         new_company: Company = await self.create(company_data)
 
         # Create m2m model between User and Company
         company_user_object = CompanyUser(
             company_id=new_company.id, user_id=current_user.id
         )
-        await self.save(company_user_object)
+        self.async_session.add(company_user_object)
+        await self._change_staff_count(new_company.id, 1)
+        await self._commit()
+        await self.invalidate_member_role(new_company.id, current_user.id)
 
         logger.debug("Successfully inserted new company instance into the database")
         return new_company.id
 
+    async def _change_staff_count(self, company_id: int, delta: int) -> None:
+        # Has to be executed in the transaction that changes the 'company_user' rows
+        await self.async_session.execute(
+            update(Company)
+            .where(Company.id == company_id)
+            .values(
+                staff_count=Company.staff_count + delta, version=Company.version + 1
+            )
+        )
+
+    @log_arguments
+    async def add_member(
+        self, company_user: CompanyUser, tag_users: list[TagUser]
+    ) -> None:
+        self.async_session.add_all([company_user, *tag_users])
+        await self._change_staff_count(company_user.company_id, 1)
+        await self._commit()
+
+    @log_arguments
+    async def delete_member(self, company_id: int, user_id: int) -> None:
+        """Deletes the member user along with its company membership"""
+        await self.async_session.execute(delete(User).where(User.id == user_id))
+        await self._change_staff_count(company_id, -1)
+        await self._commit()
+        await self.unit_of_work.after_commit(identity_cache.forget_user, user_id)
+
+    async def reconcile_staff_counts(self) -> int:
+        """Fixes the staff counters that drifted from the 'company_user' rows.
+        Returns the number of the fixed companies"""
+        members_count = (
+            select(func.count())
+            .select_from(CompanyUser)
+            .where(CompanyUser.company_id == Company.id)
+            .scalar_subquery()
+        )
+        result = await self.async_session.execute(
+            update(Company)
+            .where(Company.staff_count != members_count)
+            .values(staff_count=members_count, version=Company.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        await self._commit()
+        return result.rowcount
+
+    async def import_members(
+        self, company_id: int, members: list[dict[str, Any]]
+    ) -> dict[str, int]:
+        """Inserts the batch of new company members with multi-row statements in a
+        single transaction.
+
+        Every member is a dict with the 'users' columns and 'role' and 'tags' keys.
+        Members whose email is already registered are skipped. Returns the ids of
+        the created users by their emails
+        """
+        logger.debug(f'Importing {len(members)} members into company "{company_id}"')
+
+        user_columns = ["email", "name", "phone_number", "password"]
+
+        # A failed batch is rolled back to the savepoint and leaves the rest of the
+        # transaction intact
+        async with self.async_session.begin_nested():
+            user_ids = await self._insert_members(company_id, members, user_columns)
+        await self._commit()
+
+        logger.debug(f'Imported {len(user_ids)} members into company "{company_id}"')
+        return user_ids
+
+    async def _insert_members(
+        self, company_id: int, members: list[dict[str, Any]], user_columns: list[str]
+    ) -> dict[str, int]:
+        created_users = await self.async_session.execute(
+            pg_insert(User)
+            .values(
+                [
+                    {column: member[column] for column in user_columns}
+                    for member in members
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email, User.id)
+        )
+        user_ids: dict[str, int] = dict(created_users.all())
+
+        created_members = [member for member in members if member["email"] in user_ids]
+        if created_members:
+            await self.async_session.execute(
+                insert(CompanyUser).values(
+                    [
+                        {
+                            "company_id": company_id,
+                            "user_id": user_ids[member["email"]],
+                            "role": member["role"],
+                        }
+                        for member in created_members
+                    ]
+                )
+            )
+
+        tag_users = [
+            {"tag_id": tag_id, "user_id": user_ids[member["email"]]}
+            for member in created_members
+            for tag_id in member["tags"]
+        ]
+        if tag_users:
+            await self.async_session.execute(insert(TagUser).values(tag_users))
+
+        if user_ids:
+            await self._change_staff_count(company_id, len(user_ids))
+        return user_ids
+
+    @read_only
     async def get_user_companies(self, current_user_id: int) -> list[Company]:
         query = (
             select(Company)
@@ -47,67 +186,278 @@ class CompanyRepository(BaseRepository):
         result: list[Company] = response.unique()
         return result
 
-    async def get_company_by_id(
-        self, company_id: int, filter_string: str = ""
-    ) -> Company:
-        logger.debug(f"Received data:\n{get_args()}")
-
-        company_user_filter = (
-            (User.name.icontains(filter_string))
-            | (User.phone_number.icontains(filter_string))
-            | (User.email.icontains(filter_string))
+    @read_only
+    @log_arguments
+    async def get_company_details(
+        self,
+        company_id: int,
+        filter_string: str = "",
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Optional[dict[str, Any]]:
+        """Retrieves the company with its owner, staff count and the filtered page
+        of members in a single statement"""
+        owner = (
+            select(User.email, User.phone_number, User.name)
+            .join(CompanyUser, CompanyUser.user_id == User.id)
+            .where(
+                (CompanyUser.company_id == Company.id)
+                & (CompanyUser.role == RoleEnum.Owner)
+            )
+            .limit(1)
+            .lateral("owner")
         )
 
-        query = (
-            select(Company)
-            .outerjoin(Company.users)
-            .outerjoin(CompanyUser.users)
-            .options(contains_eager(Company.users).contains_eager(CompanyUser.users))
-            .where((Company.id == company_id) & company_user_filter)
+        members_query = (
+            select(User.id, User.name, User.email, User.phone_number, CompanyUser.role)
+            .join(CompanyUser, CompanyUser.user_id == User.id)
+            .where(CompanyUser.company_id == Company.id)
+            .order_by(User.id)
+            .offset(offset)
+            .limit(limit)
+            .correlate(Company)
         )
-        result: Company = await self.get_instance(query)
-
-        if result:
-            logger.debug(f'Retrieved company by id "{company_id}": "{result}"')
-        else:
-            # If filtered result is None, retrieve company without users
-            query = select(Company).where(Company.id == company_id)
-            result: Company = await self.get_instance(query)
+        if filter_string:
+            members_query = members_query.where(
+                (User.name.icontains(filter_string))
+                | (User.phone_number.icontains(filter_string))
+                | (User.email.icontains(filter_string))
+            )
+        members_page = members_query.subquery("members_page")
 
-        return result
+        members = (
+            select(
+                func.coalesce(
+                    func.json_agg(
+                        aggregate_order_by(
+                            func.json_build_object(
+                                "id",
+                                members_page.c.id,
+                                "name",
+                                members_page.c.name,
+                                "email",
+                                members_page.c.email,
+                                "phone_number",
+                                members_page.c.phone_number,
+                                "role",
+                                members_page.c.role,
+                            ),
+                            members_page.c.id,
+                        )
+                    ),
+                    literal_column("'[]'::json"),
+                )
+            )
+            .select_from(members_page)
+            .scalar_subquery()
+        )
 
-    async def get_company_members(self, company_id: int) -> list[CompanyMember]:
         query = (
-            select(CompanyUser)
-            .where(CompanyUser.company_id == company_id)
-            .with_only_columns(CompanyUser.user_id, CompanyUser.role)
+            select(
+                Company.id,
+                Company.title,
+                Company.description,
+                Company.created_at,
+                Company.version,
+                Company.staff_count,
+                owner.c.email.label("owner_email"),
+                owner.c.phone_number.label("owner_phone"),
+                owner.c.name.label("owner_name"),
+                members.label("users"),
+            )
+            .outerjoin(owner, true())
+            .where(Company.id == company_id)
         )
-        result: list[Company] = await self.get_many(query)
+        result = (await self.async_session.execute(query)).mappings().one_or_none()
         if result:
-            logger.debug(f'Retrieved company "{company_id}" members: "{result}"')
+            logger.debug(f'Retrieved company "{company_id}" details')
+
+        return dict(result) if result else None
 
-        return [CompanyMember(id=member[0], role=member[1]) for member in result]
+    @read_only
+    @log_arguments
+    async def search_company_members(
+        self,
+        company_id: int,
+        search_string: str,
+        limit: int,
+        after: Optional[tuple[Decimal, int]] = None,
+    ) -> list[dict[str, Any]]:
+        """Searches the company members by the name, email or phone number
+        substring, ordered by the trigram similarity (best first) and user id.
+
+        'after' is the (score, id) pair of the last member of the previous page
+        """
+        # Rounded so that the score in the cursor compares equal to the database one
+        score = func.round(
+            cast(
+                func.greatest(
+                    func.word_similarity(search_string, User.name),
+                    func.word_similarity(search_string, User.email),
+                    func.word_similarity(search_string, User.phone_number),
+                ),
+                Numeric,
+            ),
+            6,
+        )
 
-    async def get_company_owner(self, company_id: int) -> User:
         query = (
-            select(User)
+            select(
+                User.id,
+                User.name,
+                User.email,
+                User.phone_number,
+                CompanyUser.role,
+                score.label("score"),
+            )
             .join(CompanyUser, CompanyUser.user_id == User.id)
             .where(
                 (CompanyUser.company_id == company_id)
-                & (CompanyUser.role == RoleEnum.Owner)
+                & (
+                    User.name.icontains(search_string, autoescape=True)
+                    | User.email.icontains(search_string, autoescape=True)
+                    | User.phone_number.icontains(search_string, autoescape=True)
+                )
             )
+            .order_by(score.desc(), User.id)
+            .limit(limit)
         )
+        if after:
+            after_score, after_id = after
+            query = query.where(
+                (score < after_score) | ((score == after_score) & (User.id > after_id))
+            )
 
-        result: User = await self.get_instance(query)
-        if result:
-            logger.debug(f'Retrieved company "{company_id}" owner: "{result}"')
+        result = (await self.async_session.execute(query)).mappings().all()
+        logger.debug(f'Found {len(result)} members of company "{company_id}"')
+        return [dict(member) for member in result]
 
-        return result
+    @read_only
+    @log_arguments
+    async def get_company_version(self, company_id: int) -> Optional[int]:
+        query = select(Company.version).where(Company.id == company_id)
+        result = await self.async_session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def get_member_role(
+        self, company_id: int, user_id: int
+    ) -> Optional[RoleEnum]:
+        """Returns the user role in the company or None if user is not a member
+
+        Looks up the worker memory first, then Redis and only then the single
+        'company_user' row
+        """
+        key = _member_role_key(company_id, user_id)
+
+        role = member_roles_cache.get(key)
+        if role is not MISSING:
+            return role
+
+        # Non-members are cached as an empty string
+        cached_role: Optional[str] = await cache_get(key)
+        if cached_role is not None:
+            role = RoleEnum(cached_role) if cached_role else None
+            member_roles_cache.set(key, role)
+            return role
+
+        role: Optional[RoleEnum] = (
+            await self.async_session.execute(
+                _MEMBER_ROLE, {"company_id": company_id, "user_id": user_id}
+            )
+        ).scalar_one_or_none()
+        logger.debug(f'Retrieved user "{user_id}" role in company "{company_id}"')
+
+        await cache_set(key, role.value if role else "", settings.MEMBERSHIP_CACHE_TTL)
+        member_roles_cache.set(key, role)
+        return role
+
+    @log_arguments
+    async def get_members_roles(
+        self, company_id: int, user_ids: list[int]
+    ) -> dict[int, RoleEnum]:
+        """Returns the roles of the users that are the company members"""
+        query = select(CompanyUser.user_id, CompanyUser.role).where(
+            (CompanyUser.company_id == company_id) & (CompanyUser.user_id.in_(user_ids))
+        )
+        result = await self.async_session.execute(query)
+        return dict(result.all())
+
+    async def invalidate_member_role(self, company_id: int, user_id: int) -> None:
+        await self.invalidate_members_roles(company_id, [user_id])
+
+    async def invalidate_members_roles(
+        self, company_id: int, user_ids: list[int]
+    ) -> None:
+        keys = [_member_role_key(company_id, user_id) for user_id in user_ids]
+        await self.unit_of_work.after_commit(delete_cached, member_roles_cache, *keys)
+
+    @log_arguments
+    async def bulk_update_members(
+        self,
+        company_id: int,
+        member_ids: list[int],
+        role: Optional[RoleEnum] = None,
+        add_tags: Optional[list[int]] = None,
+        remove_tags: Optional[list[int]] = None,
+        replace_tags: Optional[list[int]] = None,
+    ) -> None:
+        """Applies the role and tags changes to all the members with set-based
+        statements in a single transaction"""
+        if role:
+            await self.async_session.execute(
+                update(CompanyUser)
+                .where(
+                    (CompanyUser.company_id == company_id)
+                    & (CompanyUser.user_id.in_(member_ids))
+                )
+                .values(role=role)
+            )
+
+        company_tags = select(Tag.id).where(Tag.company_id == company_id)
+        if replace_tags is not None:
+            # Only the tags of this company are replaced
+            await self.async_session.execute(
+                delete(TagUser).where(
+                    (TagUser.user_id.in_(member_ids))
+                    & (TagUser.tag_id.in_(company_tags))
+                )
+            )
+            add_tags = replace_tags
+        elif remove_tags:
+            await self.async_session.execute(
+                delete(TagUser).where(
+                    (TagUser.user_id.in_(member_ids))
+                    & (TagUser.tag_id.in_(remove_tags))
+                )
+            )
+
+        if add_tags:
+            await self.async_session.execute(
+                pg_insert(TagUser)
+                .from_select(
+                    [TagUser.tag_id, TagUser.user_id],
+                    select(Tag.id, CompanyUser.user_id).where(
+                        (Tag.id.in_(add_tags))
+                        & (Tag.company_id == company_id)
+                        & (CompanyUser.company_id == company_id)
+                        & (CompanyUser.user_id.in_(member_ids))
+                    ),
+                )
+                .on_conflict_do_nothing()
+            )
+
+        await self.async_session.execute(
+            update(Company)
+            .where(Company.id == company_id)
+            .values(version=Company.version + 1)
+        )
+        await self._commit()
+        logger.debug(f'Updated {len(member_ids)} members of company "{company_id}"')
 
+    @log_arguments
     async def update_company(
         self, company_id: int, company_data: CompanyUpdate
     ) -> Company:
-        logger.debug(f"Received data:\n{get_args()}")
         updated_company = await self.update(company_id, company_data)
 
         logger.debug(f'Successfully updatetd company instance "{company_id}"')
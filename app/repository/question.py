@@ -1,21 +1,26 @@
-from sqlalchemy import delete, select
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.orm import joinedload
 
-from app.config.logs.logger import logger
-from app.models.db.quizzes import Answer, Question, QuestionTypeEnum
+from app.config.logs.logger import log_arguments, logger
+from app.models.db.quizzes import Answer, Question, QuestionTypeEnum, Quiz
 from app.models.schemas.quizzes import QuestionCreateInput, QuestionUpdate
 from app.repository.base import BaseRepository
-from app.utilities.formatters.get_args import get_args
+
+_QUESTION_BY_ID = (
+    select(Question)
+    .options(joinedload(Question.answers))
+    .where(Question.id == bindparam("question_id"))
+)
 
 
 class QuestionRepository(BaseRepository):
     model = Question
 
+    @log_arguments
     async def save_questions(
         self, quiz_id: int, question_data: list[QuestionCreateInput]
     ) -> None:
-        logger.debug(f"Received data:\n{get_args()}")
-
         questions: list[Question] = []
         for question in question_data:
             questions.append(
@@ -30,24 +35,38 @@ class QuestionRepository(BaseRepository):
                 )
             )
 
-        await self.save_many(questions)
+        self.async_session.add_all(questions)
+        await self.async_session.flush()
+
+        # Extend the quiz question pool with the ids of the new questions
+        await self.async_session.execute(
+            update(Quiz)
+            .where(Quiz.id == quiz_id)
+            .values(
+                question_ids=func.array_cat(
+                    Quiz.question_ids, array([question.id for question in questions])
+                ),
+                version=Quiz.version + 1,
+            )
+        )
+        await self._commit()
+        self.async_session.expire_all()
 
         logger.debug(
             f"Successfully inserted saved questions of the quiz instance '{quiz_id}'"
         )
 
+    @log_arguments
     async def delete_question_answers(self, question_id: int) -> None:
-        logger.debug(f"Received data:\n{get_args()}")
         await self.async_session.execute(
             delete(Answer).where(Answer.question_id == question_id)
         )
         logger.debug(f'Successfully deleted question "{question_id}" answers')
 
+    @log_arguments
     async def update_question(
         self, quiz_id: int, question_id: int, question_data: QuestionUpdate
     ) -> None:
-        logger.debug(f"Received data:\n{get_args()}")
-
         # Update answers separately if they're provided
         if question_data.answers:
             await self.delete_question_answers(question_id)
@@ -62,26 +81,52 @@ class QuestionRepository(BaseRepository):
             await self.save_many(answers)
             question_data.answers = None
 
+        # Questions are a part of the quiz data
+        await self.async_session.execute(
+            update(Quiz).where(Quiz.id == quiz_id).values(version=Quiz.version + 1)
+        )
         await self.update(question_id, question_data)
         logger.debug(f'Successfully updatetd question instance "{question_id}"')
 
+    @log_arguments
     async def get_question_by_id(self, question_id: int) -> Question:
-        logger.debug(f"Received data:\n{get_args()}")
+        result: Question = await self.get_instance(
+            _QUESTION_BY_ID, {"question_id": question_id}
+        )
+        if result:
+            logger.debug(f'Retrieved question by id "{question_id}": "{result}"')
+
+        return result
 
+    @log_arguments
+    async def get_questions_by_ids(self, question_ids: list[int]) -> list[Question]:
         query = (
             select(Question)
             .options(joinedload(Question.answers))
-            .where(Question.id == question_id)
+            .where(Question.id.in_(question_ids))
         )
+        questions: list[Question] = self.unpack(await self.get_many(query))
 
-        result: Question = await self.get_instance(query)
-        if result:
-            logger.debug(f'Retrieved question by id "{question_id}": "{result}"')
-
-        return result
+        # Keep the order of the passed ids (e.g. the order they were sampled in)
+        positions = {question_id: i for i, question_id in enumerate(question_ids)}
+        return sorted(questions, key=lambda question: positions[question.id])
 
+    @log_arguments
     async def delete_question(self, question_id: int) -> None:
-        logger.debug(f"Received data:\n{get_args()}")
+        # Remove the question from its quiz pool (committed alongside the deletion)
+        await self.async_session.execute(
+            update(Quiz)
+            .where(
+                Quiz.id
+                == select(Question.quiz_id)
+                .where(Question.id == question_id)
+                .scalar_subquery()
+            )
+            .values(
+                question_ids=func.array_remove(Quiz.question_ids, question_id),
+                version=Quiz.version + 1,
+            )
+        )
         result = await self.delete(question_id)
 
         logger.debug(
@@ -1,28 +1,56 @@
-from sqlalchemy import delete, func, select
+import random
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import ARRAY, Integer, bindparam, delete, func, select, true, update
 from sqlalchemy.orm import aliased, contains_eager, joinedload
 
-from app.config.logs.logger import logger
+from app.config.logs.logger import log_arguments, logger
+from app.models.db.companies import CompanyUser, RoleEnum
 from app.models.db.quizzes import Question, Quiz
-from app.models.db.users import Tag, TagQuiz
+from app.models.db.users import TagQuiz
 from app.models.schemas.quizzes import QuizCreateInput, QuizUpdate
 from app.repository.base import BaseRepository
-from app.utilities.formatters.get_args import get_args
+from app.repository.routing import read_only
+
+_QUIZ_BY_ID = select(Quiz).where(Quiz.id == bindparam("quiz_id"))
+
+# The positions are bound as one array, so the statement is the same for every
+# sample size
+_SAMPLED_POSITIONS = (
+    func.unnest(bindparam("positions", type_=ARRAY(Integer)))
+    .table_valued("position")
+    .render_derived()
+)
+_SAMPLED_QUESTION_IDS = (
+    select(Quiz.question_ids[_SAMPLED_POSITIONS.c.position])
+    .select_from(Quiz)
+    .join(_SAMPLED_POSITIONS, true())
+    .where(Quiz.id == bindparam("quiz_id"))
+)
+
+
+@dataclass
+class QuizVersion:
+    company_id: int
+    version: int
+    # Role of the requesting user in the quiz company (None if not a member)
+    role: Optional[RoleEnum]
 
 
 class QuizRepository(BaseRepository):
     model = Quiz
 
+    @log_arguments
     async def create_quiz(self, quiz_data: QuizCreateInput) -> int:
-        logger.debug(f"Received data:\n{get_args()}")
-
         new_quiz: Quiz = await self.create(quiz_data)
 
         logger.debug("Successfully inserted new quiz instance into the database")
         return new_quiz.id
 
+    @read_only
+    @log_arguments
     async def get_full_quiz(self, quiz_id: int) -> Quiz:
-        logger.debug(f"Received data:\n{get_args()}")
-
         query = (
             select(Quiz)
             .options(joinedload(Quiz.questions), joinedload(Quiz.tags))
@@ -35,12 +63,29 @@ class QuizRepository(BaseRepository):
 
         return result
 
-    async def get_quiz_data(self, quiz_id: int) -> Quiz:
-        logger.debug(f"Received data:\n{get_args()}")
+    @read_only
+    @log_arguments
+    async def get_quiz_version(
+        self, quiz_id: int, user_id: int
+    ) -> Optional[QuizVersion]:
+        query = (
+            select(Quiz.company_id, Quiz.version, CompanyUser.role)
+            .outerjoin(
+                CompanyUser,
+                (CompanyUser.company_id == Quiz.company_id)
+                & (CompanyUser.user_id == user_id),
+            )
+            .where(Quiz.id == quiz_id)
+        )
+        result = (await self.async_session.execute(query)).first()
+        if not result:
+            return None
 
-        query = select(Quiz).where(Quiz.id == quiz_id)
+        return QuizVersion(company_id=result[0], version=result[1], role=result[2])
 
-        result: Quiz = await self.get_instance(query)
+    @log_arguments
+    async def get_quiz_data(self, quiz_id: int) -> Quiz:
+        result: Quiz = await self.get_instance(_QUIZ_BY_ID, {"quiz_id": quiz_id})
         if result:
             logger.debug(f'Retrieved quiz data by id "{quiz_id}": "{result}"')
         return result
@@ -54,9 +99,9 @@ class QuizRepository(BaseRepository):
         result: Question = query.unique().scalar_one_or_none()
         return bool(result)
 
+    @read_only
+    @log_arguments
     async def get_all_company_quizzes(self, company_id: int) -> list[Quiz]:
-        logger.debug(f"Received data:\n{get_args()}")
-
         query = (
             select(Quiz)
             .options(joinedload(Quiz.tags))
@@ -72,11 +117,12 @@ class QuizRepository(BaseRepository):
                 quiz.tags = [tag.tags for tag in quiz.tags]
         return result
 
+    @read_only
+    @log_arguments
     async def get_member_quizzes(
-        self, company_id: int, user_tags: list[Tag]
+        self, company_id: int, tag_ids: Iterable[int]
     ) -> list[Quiz]:
-        logger.debug(f"Received data:\n{get_args()}")
-        tag_ids = [tag.id for tag in user_tags]
+        tag_ids = list(tag_ids)
 
         # Alias that prevents filtering tags inside Quiz
         tag_quiz_alias = aliased(TagQuiz)
@@ -100,9 +146,8 @@ class QuizRepository(BaseRepository):
                 quiz.tags = [tag.tags for tag in quiz.tags]
         return result
 
+    @log_arguments
     async def get_quiz_company_id(self, quiz_id: int) -> int:
-        logger.debug(f"Received data:\n{get_args()}")
-
         query = (select(Quiz).where(Quiz.id == quiz_id)).with_only_columns(
             Quiz.company_id
         )
@@ -111,9 +156,8 @@ class QuizRepository(BaseRepository):
         logger.debug(f'Retrieved quiz "{quiz_id}" company_id: "{result}"')
         return result.scalar_one_or_none()
 
+    @log_arguments
     async def get_questions_count(self, quiz_id: int) -> int:
-        logger.debug(f"Received data:\n{get_args()}")
-
         result = await self.async_session.execute(
             select(func.count(Question.id)).where(Question.quiz_id == quiz_id)
         )
@@ -124,15 +168,45 @@ class QuizRepository(BaseRepository):
         result = self.unpack(await self.get_many(query))
         return result
 
-    async def update_quiz(self, quiz_id: int, quiz_data: QuizUpdate) -> Quiz:
-        logger.debug(f"Received data:\n{get_args()}")
-        updated_quiz = await self.update(quiz_id, quiz_data)
+    @log_arguments
+    async def sample_question_ids(
+        self, quiz_id: int, sample_size: Optional[int]
+    ) -> list[int]:
+        """Draws random question ids from the quiz question pool
+
+        Only the pool size and the sampled array elements are fetched, so the cost
+        doesn't depend on the amount of questions in the pool.
+        """
+        pool_size: int = (
+            await self.async_session.execute(
+                select(func.cardinality(Quiz.question_ids)).where(Quiz.id == quiz_id)
+            )
+        ).scalar_one()
+
+        if not sample_size or sample_size >= pool_size:
+            result = await self.async_session.execute(
+                select(Quiz.question_ids).where(Quiz.id == quiz_id)
+            )
+            return list(result.scalar_one())
+
+        # Postgres arrays are 1-based
+        positions: list[int] = random.sample(range(1, pool_size + 1), sample_size)
+        result = await self.async_session.execute(
+            _SAMPLED_QUESTION_IDS, {"quiz_id": quiz_id, "positions": positions}
+        )
+        return list(result.scalars())
+
+    @log_arguments
+    async def update_quiz(
+        self, quiz_id: int, quiz_data: QuizUpdate, clear_fields: Iterable[str] = ()
+    ) -> Quiz:
+        updated_quiz = await self.update(quiz_id, quiz_data, clear_fields)
 
         logger.debug(f'Successfully updatetd quiz instance "{quiz_id}"')
         return updated_quiz
 
+    @log_arguments
     async def delete_quiz(self, quiz_id) -> None:
-        logger.debug(f"Received data:\n{get_args()}")
         result = await self.delete(quiz_id)
 
         logger.debug(
@@ -140,11 +214,13 @@ class QuizRepository(BaseRepository):
         )
         return result
 
+    @log_arguments
     async def delete_related_tag_quiz(self, quiz_id: int) -> None:
-        logger.debug(f"Received data:\n{get_args()}")
-
         # Delete all relataed TagQuiz objects
         await self.async_session.execute(
             delete(TagQuiz).where(TagQuiz.quiz_id == quiz_id)
         )
-        await self.async_session.commit()
+        await self.async_session.execute(
+            update(Quiz).where(Quiz.id == quiz_id).values(version=Quiz.version + 1)
+        )
+        await self._commit()
@@ -0,0 +1,107 @@
+import asyncio
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.logs.logger import logger
+from app.config.settings.base import settings
+from app.core.database import replica_session_maker
+
+# Session of the replica used by the read-only method that is running right now
+routed_session: ContextVar[Optional[AsyncSession]] = ContextVar(
+    "routed_session", default=None
+)
+
+ReadMethod = TypeVar("ReadMethod", bound=Callable[..., Awaitable[Any]])
+
+_replica_unavailable_until: float = 0
+
+
+def _is_replica_failure(error: Exception) -> bool:
+    if isinstance(error, DBAPIError):
+        return (
+            isinstance(error, (OperationalError, InterfaceError))
+            or error.connection_invalidated
+        )
+    return isinstance(error, (OSError, asyncio.TimeoutError))
+
+
+def _use_replica(primary_session: AsyncSession) -> bool:
+    if replica_session_maker is None or routed_session.get() is not None:
+        return False
+
+    # Read your writes: once the request has changed something, the replica
+    # might not have caught up yet
+    if (
+        primary_session.info.get("has_writes")
+        or primary_session.new
+        or primary_session.dirty
+        or primary_session.deleted
+    ):
+        return False
+
+    return time.monotonic() >= _replica_unavailable_until
+
+
+def _get_replica_session(primary_session: AsyncSession) -> AsyncSession:
+    """Replica session of the request, opened by its first read, so that all the
+    reads of the request use one connection and one snapshot"""
+    replica_session = primary_session.info.get("replica_session")
+    if replica_session is None:
+        replica_session = primary_session.info[
+            "replica_session"
+        ] = replica_session_maker()
+    return replica_session
+
+
+async def close_replica_session(primary_session: AsyncSession) -> None:
+    replica_session = primary_session.info.pop("replica_session", None)
+    if replica_session is not None:
+        await replica_session.close()
+
+
+def read_only(method: ReadMethod) -> ReadMethod:
+    """Runs the repository method on the read replica
+
+    The method falls back to the primary when there is no replica, when the
+    replica is unavailable and after the request has written to the primary.
+    Returned instances are detached, so they can be saved with the primary session.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        global _replica_unavailable_until
+
+        if not _use_replica(self.primary_session):
+            return await method(self, *args, **kwargs)
+
+        replica_session = _get_replica_session(self.primary_session)
+        try:
+            token = routed_session.set(replica_session)
+            try:
+                result = await method(self, *args, **kwargs)
+            finally:
+                routed_session.reset(token)
+            replica_session.expunge_all()
+            return result
+        except Exception as error:
+            if not _is_replica_failure(error):
+                raise
+
+            await close_replica_session(self.primary_session)
+
+            logger.warning(
+                f'Replica is unavailable, "{method.__qualname__}" falls back to '
+                f"the primary for {settings.REPLICA_RETRY_INTERVAL}s: {error}"
+            )
+            _replica_unavailable_until = (
+                time.monotonic() + settings.REPLICA_RETRY_INTERVAL
+            )
+
+        return await method(self, *args, **kwargs)
+
+    return wrapper
@@ -1,32 +1,95 @@
-from sqlalchemy import func, select
-from sqlalchemy.orm import load_only
+import json
+from typing import Iterable, Optional
 
-from app.config.logs.logger import logger
+from sqlalchemy import delete, exists, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased, load_only
+
+from app.config.logs.logger import log_arguments, logger
+from app.config.settings.base import settings
+from app.core.cache import MISSING, LocalCache, cache_get, cache_set, delete_cached
+from app.models.db.companies import CompanyUser
+from app.models.db.quizzes import Quiz
 from app.models.db.users import Tag, TagQuiz, TagUser
 from app.models.schemas.tags import TagCreateInput, TagUpdateInput
 from app.repository.base import BaseRepository
-from app.utilities.formatters.get_args import get_args
+from app.repository.routing import read_only
+
+# Tag ids of the users resolved by this worker
+user_tag_ids_cache = LocalCache(
+    max_size=settings.USER_TAGS_LOCAL_CACHE_SIZE,
+    ttl=settings.USER_TAGS_LOCAL_CACHE_TTL,
+)
+
+
+# Tags (id -> title) of the companies resolved by this worker
+company_tags_cache = LocalCache(
+    max_size=settings.COMPANY_TAGS_LOCAL_CACHE_SIZE,
+    ttl=settings.COMPANY_TAGS_LOCAL_CACHE_TTL,
+)
+
+
+def _user_tag_ids_key(user_id: int) -> str:
+    return f"user:{user_id}:tag-ids"
+
+
+def _company_tags_key(company_id: int) -> str:
+    return f"company:{company_id}:tags"
 
 
 class TagRepository(BaseRepository):
     model = Tag
 
+    @log_arguments
     async def create_tag(self, tag_data: TagCreateInput) -> int:
-        logger.debug(f"Received data:\n{get_args()}")
-
         new_tag: Tag = await self.create(tag_data)
+        await self.invalidate_company_tags(tag_data.company_id)
 
         logger.debug("Successfully inserted new tag instance into the database")
         return new_tag.id
 
-    async def get_company_tags(self, company_id: int) -> list[Tag]:
+    async def get_company_tags(
+        self, company_id: int, use_local_cache: bool = True
+    ) -> dict[int, str]:
+        """Returns the company tags catalogue (titles by ids)
+
+        Looks up the worker memory first, then Redis and only then 'tags'. The
+        worker memory isn't invalidated by the changes made on other workers, so
+        it is skipped with 'use_local_cache=False' where stale tags matter
+        """
+        key = _company_tags_key(company_id)
+
+        if use_local_cache:
+            tags = company_tags_cache.get(key)
+            if tags is not MISSING:
+                return tags
+
+        cached_tags: Optional[str] = await cache_get(key)
+        if cached_tags is not None:
+            tags = {
+                int(tag_id): title for tag_id, title in json.loads(cached_tags).items()
+            }
+            company_tags_cache.set(key, tags)
+            return tags
+
         query = (
-            select(Tag)
-            .options(load_only(Tag.id, Tag.title))
+            select(Tag.id, Tag.title)
             .where(Tag.company_id == company_id)
+            .order_by(Tag.id)
         )
-        return self.unpack(await self.get_many(query))
+        tags = dict((await self.async_session.execute(query)).all())
+        logger.debug(f'Retrieved company "{company_id}" tags: {tags}')
 
+        await cache_set(key, json.dumps(tags), settings.COMPANY_TAGS_CACHE_TTL)
+        company_tags_cache.set(key, tags)
+        return tags
+
+    async def invalidate_company_tags(self, company_id: int) -> None:
+        await self.unit_of_work.after_commit(
+            delete_cached, company_tags_cache, _company_tags_key(company_id)
+        )
+
+    @read_only
     async def get_user_tags(self, user_id: int) -> list[Tag]:
         query = (
             select(Tag)
@@ -36,6 +99,50 @@ class TagRepository(BaseRepository):
         )
         return self.unpack(await self.get_many(query))
 
+    async def get_user_tag_ids(self, user_id: int) -> frozenset[int]:
+        """Returns the ids of the user tags
+
+        Looks up the worker memory first, then Redis and only then 'tag_user'
+        """
+        key = _user_tag_ids_key(user_id)
+
+        tag_ids = user_tag_ids_cache.get(key)
+        if tag_ids is not MISSING:
+            return tag_ids
+
+        cached_tag_ids: Optional[str] = await cache_get(key)
+        if cached_tag_ids is not None:
+            tag_ids = frozenset(
+                int(tag_id) for tag_id in cached_tag_ids.split(",") if tag_id
+            )
+            user_tag_ids_cache.set(key, tag_ids)
+            return tag_ids
+
+        query = select(TagUser.tag_id).where(TagUser.user_id == user_id)
+        tag_ids = frozenset((await self.async_session.execute(query)).scalars().all())
+        logger.debug(f'Retrieved user "{user_id}" tag ids: {set(tag_ids)}')
+
+        await cache_set(key, ",".join(map(str, tag_ids)), settings.USER_TAGS_CACHE_TTL)
+        user_tag_ids_cache.set(key, tag_ids)
+        return tag_ids
+
+    async def invalidate_user_tag_ids(self, user_ids: Iterable[int]) -> None:
+        keys = [_user_tag_ids_key(user_id) for user_id in user_ids]
+        await self.unit_of_work.after_commit(delete_cached, user_tag_ids_cache, *keys)
+
+    @log_arguments
+    async def quiz_has_any_tag(self, quiz_id: int, tag_ids: Iterable[int]) -> bool:
+        """Checks if the quiz is tagged with any of the tags"""
+        tag_ids = list(tag_ids)
+        if not tag_ids:
+            return False
+
+        query = select(
+            exists().where((TagQuiz.quiz_id == quiz_id) & (TagQuiz.tag_id.in_(tag_ids)))
+        )
+        return bool((await self.async_session.execute(query)).scalar())
+
+    @read_only
     async def get_quiz_tags(self, quiz_id: int) -> list[Tag]:
         query = (
             select(Tag)
@@ -45,36 +152,164 @@ class TagRepository(BaseRepository):
         )
         return self.unpack(await self.get_many(query))
 
+    @log_arguments
     async def get_tag_by_id(self, tag_id) -> Tag:
-        logger.debug(f"Received data:\n{get_args()}")
-
         query = select(Tag).where(Tag.id == tag_id)
         result: Tag = await self.get_instance(query)
         if result:
             logger.debug(f'Retrieved tag by id "{tag_id}": "{result}"')
         return result
 
+    async def _bump_tag_quizzes_version(self, tag_id: int) -> None:
+        # Tags are a part of the quiz data
+        await self.async_session.execute(
+            update(Quiz)
+            .where(Quiz.id.in_(select(TagQuiz.quiz_id).where(TagQuiz.tag_id == tag_id)))
+            .values(version=Quiz.version + 1)
+        )
+
+    @log_arguments
+    async def attach_to_users(
+        self, tag_id: int, company_id: int, user_ids: list[int]
+    ) -> int:
+        """Attaches the tag to the users that are the company members.
+        Returns the number of the new links"""
+        result = await self.async_session.execute(
+            pg_insert(TagUser)
+            .from_select(
+                [TagUser.tag_id, TagUser.user_id],
+                select(literal(tag_id), CompanyUser.user_id).where(
+                    (CompanyUser.company_id == company_id)
+                    & (CompanyUser.user_id.in_(user_ids))
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
+        await self._commit()
+        await self.invalidate_user_tag_ids(user_ids)
+        return result.rowcount
+
+    @log_arguments
+    async def get_users_with_only_tag(
+        self, tag_id: int, user_ids: list[int]
+    ) -> list[int]:
+        """Returns the users that would be left without tags if the tag is detached"""
+        other_tags = aliased(TagUser)
+        query = select(TagUser.user_id).where(
+            (TagUser.tag_id == tag_id)
+            & (TagUser.user_id.in_(user_ids))
+            & ~exists().where(
+                (other_tags.user_id == TagUser.user_id) & (other_tags.tag_id != tag_id)
+            )
+        )
+        return (await self.async_session.execute(query)).scalars().all()
+
+    @log_arguments
+    async def detach_from_users(self, tag_id: int, user_ids: list[int]) -> int:
+        result = await self.async_session.execute(
+            delete(TagUser).where(
+                (TagUser.tag_id == tag_id) & (TagUser.user_id.in_(user_ids))
+            )
+        )
+        await self._commit()
+        await self.invalidate_user_tag_ids(user_ids)
+        return result.rowcount
+
+    @log_arguments
+    async def attach_to_quizzes(
+        self, tag_id: int, company_id: int, quiz_ids: list[int]
+    ) -> int:
+        """Attaches the tag to the company quizzes.
+        Returns the number of the new links"""
+        result = await self.async_session.execute(
+            pg_insert(TagQuiz)
+            .from_select(
+                [TagQuiz.tag_id, TagQuiz.quiz_id],
+                select(literal(tag_id), Quiz.id).where(
+                    (Quiz.company_id == company_id) & (Quiz.id.in_(quiz_ids))
+                ),
+            )
+            .on_conflict_do_nothing()
+            .returning(TagQuiz.quiz_id)
+        )
+        # Quizzes that already had the tag are left unchanged
+        attached_quiz_ids: list[int] = result.scalars().all()
+        if attached_quiz_ids:
+            await self.async_session.execute(
+                update(Quiz)
+                .where(Quiz.id.in_(attached_quiz_ids))
+                .values(version=Quiz.version + 1)
+            )
+        await self._commit()
+        return len(attached_quiz_ids)
+
+    @log_arguments
+    async def get_quizzes_with_only_tag(
+        self, tag_id: int, quiz_ids: list[int]
+    ) -> list[int]:
+        """Returns the quizzes that would be left without tags if the tag is detached"""
+        other_tags = aliased(TagQuiz)
+        query = select(TagQuiz.quiz_id).where(
+            (TagQuiz.tag_id == tag_id)
+            & (TagQuiz.quiz_id.in_(quiz_ids))
+            & ~exists().where(
+                (other_tags.quiz_id == TagQuiz.quiz_id) & (other_tags.tag_id != tag_id)
+            )
+        )
+        return (await self.async_session.execute(query)).scalars().all()
+
+    @log_arguments
+    async def detach_from_quizzes(self, tag_id: int, quiz_ids: list[int]) -> int:
+        result = await self.async_session.execute(
+            delete(TagQuiz)
+            .where((TagQuiz.tag_id == tag_id) & (TagQuiz.quiz_id.in_(quiz_ids)))
+            .returning(TagQuiz.quiz_id)
+        )
+        detached_quiz_ids: list[int] = result.scalars().all()
+        if detached_quiz_ids:
+            await self.async_session.execute(
+                update(Quiz)
+                .where(Quiz.id.in_(detached_quiz_ids))
+                .values(version=Quiz.version + 1)
+            )
+        await self._commit()
+        return len(detached_quiz_ids)
+
+    @log_arguments
     async def update_tag(self, tag_id: int, tag_data: TagUpdateInput) -> Tag:
-        logger.debug(f"Received data:\n{get_args()}")
+        await self._bump_tag_quizzes_version(tag_id)
         updated_tag = await self.update(tag_id, tag_data)
+        await self.invalidate_company_tags(updated_tag.company_id)
 
         logger.debug(f'Successfully updatetd tag instance "{tag_id}"')
         return updated_tag
 
+    @log_arguments
     async def delete_tag(self, tag_id: int) -> None:
-        logger.debug(f"Received data:\n{get_args()}")
-        await self.delete(tag_id)
-
-    async def tags_exist_by_id(self, tag_ids: list[int], company_id: int) -> bool:
-        logger.debug(f"Received data:\n{get_args()}")
+        await self._bump_tag_quizzes_version(tag_id)
 
-        result = await self.async_session.execute(
-            select(func.count(Tag.id)).where(
-                (Tag.id.in_(tag_ids)) & (Tag.company_id == company_id)
+        # Users lose the tag along with its deletion
+        user_ids = (
+            (
+                await self.async_session.execute(
+                    select(TagUser.user_id).where(TagUser.tag_id == tag_id)
+                )
             )
+            .scalars()
+            .all()
         )
-        count = result.scalar()
+        company_id: int = (
+            await self.async_session.execute(
+                select(Tag.company_id).where(Tag.id == tag_id)
+            )
+        ).scalar_one()
+        await self.delete(tag_id)
+        await self.invalidate_user_tag_ids(user_ids)
+        await self.invalidate_company_tags(company_id)
 
-        if count == len(tag_ids):
-            return True
-        return False
+    @log_arguments
+    async def tags_exist_by_id(self, tag_ids: list[int], company_id: int) -> bool:
+        # Duplicated ids are not accepted. Redis is invalidated on every tag change,
+        # so the tags created or deleted on the other workers are already seen
+        company_tags = await self.get_company_tags(company_id, use_local_cache=False)
+        return len(set(tag_ids)) == len(tag_ids) and set(tag_ids) <= company_tags.keys()
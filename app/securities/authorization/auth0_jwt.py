@@ -2,23 +2,23 @@ import jwt
 from fastapi import HTTPException, status
 
 from app.config.settings.base import settings
+from app.securities.authorization.jwks import JWKSCache, jwks_cache
 
 
 class Auth0TokenValidator:
     """Auth0 token verification class"""
 
-    def __init__(self, token: str) -> None:
+    def __init__(self, token: str, jwks_cache: JWKSCache = jwks_cache) -> None:
         self.token: str = token
 
-        # This gets the JWKS from a given URL and does processing so you can
-        # use any of the keys available
-        jwks_url = f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json"
-        self.jwks_client = jwt.PyJWKClient(jwks_url)
+        # Signing keys are shared by all the validators of the process
+        self.jwks_cache = jwks_cache
 
     async def verify(self) -> dict[str, bool]:
         # This gets the 'kid' from the passed token
         try:
-            self.signing_key = self.jwks_client.get_signing_key_from_jwt(self.token).key
+            kid = jwt.get_unverified_header(self.token).get("kid")
+            self.signing_key = (await self.jwks_cache.get_signing_key(kid)).key
         except jwt.exceptions.PyJWKClientError:
             raise HTTPException(
                 status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
@@ -43,7 +43,12 @@ class Auth0TokenValidator:
             )
 
         # Get user id (or None if user is not registered yet)
-        return {"email": payload["email"], "id": None, "auth0": True}
+        return {
+            "email": payload["email"],
+            "id": None,
+            "auth0": True,
+            "exp": payload.get("exp"),
+        }
 
 
 def get_auth0_token_validator(token: str) -> Auth0TokenValidator:
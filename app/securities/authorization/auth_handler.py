@@ -4,25 +4,20 @@ from typing import Dict, Optional
 import jwt
 from fastapi import HTTPException
 from fastapi.security import HTTPBearer
-from passlib.context import CryptContext
 from starlette import status
 
 from app.config.settings.base import settings
 from app.securities.authorization.auth0_jwt import get_auth0_token_validator
+from app.securities.authorization.password_hasher import password_hasher
 
 
 class AuthHandler:
     def __init__(self) -> None:
         self.security = HTTPBearer()
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        # Hashes and verifies the passwords outside of the event loop
+        self.password_hasher = password_hasher
         self.secret: str = settings.JWT_SECRET
 
-    def get_password_hash(self, password: str) -> str:
-        return self.pwd_context.hash(password)
-
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password, scheme="bcrypt")
-
     def encode_token(self, user_id: int, user_email: str) -> str:
         # Initialize user_crud object to get user id once and put it in jwt payload
 
@@ -37,7 +32,12 @@ class AuthHandler:
     async def decode_token(self, token: str) -> Optional[Dict[str, bool]]:
         try:
             payload = jwt.decode(token, self.secret, algorithms=["HS256"])
-            return {"email": payload["sub"], "id": payload["id"], "auth0": False}
+            return {
+                "email": payload["sub"],
+                "id": payload["id"],
+                "auth0": False,
+                "exp": payload["exp"],
+            }
         except jwt.ExpiredSignatureError:
             raise HTTPException(
                 status.HTTP_401_UNAUTHORIZED, detail="Signature has expired"
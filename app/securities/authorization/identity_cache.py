@@ -0,0 +1,60 @@
+import hashlib
+import time
+from typing import Any, Optional
+
+from app.config.settings.base import settings
+from app.core.cache import MISSING, LocalCache
+
+
+class IdentityCache:
+    """Worker-local cache of the verified tokens and Auth0 users ids
+
+    Lets authenticated requests skip the token signature verification and the
+    user lookup while the token is valid. Entries of the verified tokens never
+    outlive the token 'exp' claim.
+    """
+
+    def __init__(self, max_size: int, token_ttl: int, user_id_ttl: int) -> None:
+        self.token_ttl = token_ttl
+        self.tokens = LocalCache(max_size=max_size, ttl=token_ttl)
+        self.auth0_user_ids = LocalCache(max_size=max_size, ttl=user_id_ttl)
+
+    @staticmethod
+    def _token_key(token: str) -> bytes:
+        # Keys are digests so the cache does not keep the raw tokens
+        return hashlib.sha256(token.encode()).digest()
+
+    def get_claims(self, token: str) -> Optional[dict[str, Any]]:
+        claims = self.tokens.get(self._token_key(token))
+        if claims is MISSING:
+            return None
+        return dict(claims)
+
+    def set_claims(self, token: str, claims: dict[str, Any]) -> None:
+        # Tokens without a resolved user id still require a database lookup
+        if not claims.get("id"):
+            return
+
+        ttl = self.token_ttl
+        if claims.get("exp") is not None:
+            ttl = min(ttl, claims["exp"] - time.time())
+        if ttl > 0:
+            self.tokens.set(self._token_key(token), dict(claims), ttl=ttl)
+
+    def get_auth0_user_id(self, email: str) -> Optional[int]:
+        user_id = self.auth0_user_ids.get(email)
+        return None if user_id is MISSING else user_id
+
+    def set_auth0_user_id(self, email: str, user_id: int) -> None:
+        self.auth0_user_ids.set(email, user_id)
+
+    def forget_user(self, user_id: int) -> None:
+        self.tokens.delete_matching(lambda _, claims: claims["id"] == user_id)
+        self.auth0_user_ids.delete_matching(lambda _, value: value == user_id)
+
+
+identity_cache = IdentityCache(
+    max_size=settings.AUTH_TOKEN_CACHE_SIZE,
+    token_ttl=settings.AUTH_TOKEN_CACHE_TTL,
+    user_id_ttl=settings.AUTH0_USER_ID_CACHE_TTL,
+)
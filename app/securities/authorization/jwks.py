@@ -0,0 +1,163 @@
+import asyncio
+import json
+import time
+import urllib.request
+from typing import Any, Awaitable, Callable, Optional
+
+import jwt
+from jwt.exceptions import PyJWKClientConnectionError, PyJWKClientError
+
+from app.config.logs.logger import logger
+from app.config.settings.base import settings
+
+JWKSFetcher = Callable[[str], Awaitable[dict[str, Any]]]
+
+
+def _fetch_jwks_sync(url: str) -> dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=settings.AUTH0_JWKS_TIMEOUT) as response:
+        return json.load(response)
+
+
+async def fetch_jwks(url: str) -> dict[str, Any]:
+    # urllib is blocking, so the request is made outside of the event loop
+    return await asyncio.to_thread(_fetch_jwks_sync, url)
+
+
+class JWKSCache:
+    """Process-wide cache of the JWKS signing keys
+
+    Keys are refreshed when they expire, when a token is signed with an unknown
+    'kid' (key rotation) and periodically in the background. Concurrent refreshes
+    share a single request to the JWKS endpoint. Expired keys are served while
+    they are refreshed in the background, so that an outage of the endpoint
+    doesn't make every request wait for its timeout.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl: int,
+        min_refresh_interval: int,
+        fetcher: JWKSFetcher = fetch_jwks,
+    ) -> None:
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.fetcher = fetcher
+
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._fetched_at: float = 0
+        self._refreshed_at: float = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._background_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_expired(self) -> bool:
+        return time.monotonic() - self._fetched_at >= self.ttl
+
+    @property
+    def can_refresh(self) -> bool:
+        return time.monotonic() - self._refreshed_at >= self.min_refresh_interval
+
+    async def get_signing_key(self, kid: Optional[str]) -> jwt.PyJWK:
+        if not self._keys:
+            await self.refresh()
+        elif self.is_expired and self.can_refresh:
+            self._refresh_in_background()
+
+        signing_key = self._keys.get(kid)
+
+        # Unknown key id might mean that the keys have been rotated
+        if signing_key is None and self.can_refresh:
+            await self._refresh_or_serve_stale()
+            signing_key = self._keys.get(kid)
+
+        if signing_key is None:
+            raise PyJWKClientError(
+                f'Unable to find a signing key that matches: "{kid}"'
+            )
+
+        return signing_key
+
+    async def refresh(self) -> None:
+        # Callers that come while the keys are being fetched wait for the same task
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._fetch_keys())
+        await asyncio.shield(self._refresh_task)
+
+    def _refresh_in_background(self) -> None:
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._fetch_keys())
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                f"Unable to refresh JWKS, using the cached keys: {task.exception()}"
+            )
+
+    async def _refresh_or_serve_stale(self) -> None:
+        try:
+            await self.refresh()
+        except PyJWKClientError as error:
+            # Expired keys are still better than failing every Auth0 request
+            if not self._keys:
+                raise
+            logger.warning(f"Unable to refresh JWKS, using the cached keys: {error}")
+
+    async def _fetch_keys(self) -> None:
+        try:
+            self._refreshed_at = time.monotonic()
+            try:
+                jwk_set = jwt.PyJWKSet.from_dict(await self.fetcher(self.url))
+            except Exception as error:
+                raise PyJWKClientConnectionError(
+                    f'Failed to load JWKS from "{self.url}": {error}'
+                )
+
+            signing_keys = {
+                key.key_id: key
+                for key in jwk_set.keys
+                if key.public_key_use in ["sig", None] and key.key_id
+            }
+            if not signing_keys:
+                raise PyJWKClientError(
+                    "The JWKS endpoint did not contain any signing keys"
+                )
+
+            self._keys = signing_keys
+            self._fetched_at = time.monotonic()
+            logger.info(f"Fetched {len(signing_keys)} JWKS signing keys")
+        finally:
+            self._refresh_task = None
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except PyJWKClientError as error:
+                logger.warning(f"Background JWKS refresh failed: {error}")
+
+            await asyncio.sleep(self.ttl)
+
+    def start_background_refresh(self) -> None:
+        if self._background_task is None:
+            self._background_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop_background_refresh(self) -> None:
+        if self._background_task is not None:
+            self._background_task.cancel()
+            try:
+                await self._background_task
+            except asyncio.CancelledError:
+                pass
+            self._background_task = None
+
+
+jwks_cache = JWKSCache(
+    url=settings.AUTH0_JWKS_URL
+    or f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json",
+    ttl=settings.AUTH0_JWKS_CACHE_TTL,
+    min_refresh_interval=settings.AUTH0_JWKS_MIN_REFRESH_INTERVAL,
+)
@@ -0,0 +1,157 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config.logs.logger import logger
+from app.config.settings.base import settings
+from app.core.metrics import (
+    password_hashing_completed,
+    password_hashing_in_progress,
+    password_hashing_queue_depth,
+    password_hashing_rejected,
+)
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification in a bounded thread pool
+
+    bcrypt releases the GIL, so the event loop keeps serving other requests while
+    passwords are processed. Calls beyond the workers and the queue limit are
+    rejected instead of piling up behind a login storm. Bulk hashing runs in a
+    separate pool with its own limits, so that imports don't hold the workers of
+    the regular requests.
+    """
+
+    def __init__(
+        self,
+        pwd_context: CryptContext,
+        max_workers: int,
+        max_queue_size: int,
+        bulk_max_workers: int,
+        bulk_max_queue_size: int,
+    ) -> None:
+        self.pwd_context = pwd_context
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.bulk_max_workers = bulk_max_workers
+        self.bulk_max_queue_size = bulk_max_queue_size
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+        self._bulk_executor = ThreadPoolExecutor(
+            max_workers=bulk_max_workers, thread_name_prefix="password-bulk"
+        )
+        self._pending: int = 0
+        self._bulk_pending: int = 0
+
+    @property
+    def in_progress(self) -> int:
+        return min(self._pending, self.max_workers)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    @property
+    def bulk_in_progress(self) -> int:
+        return min(self._bulk_pending, self.bulk_max_workers)
+
+    @property
+    def bulk_queue_depth(self) -> int:
+        return max(0, self._bulk_pending - self.bulk_max_workers)
+
+    def _update_gauges(self) -> None:
+        password_hashing_in_progress.labels("regular").set(self.in_progress)
+        password_hashing_queue_depth.labels("regular").set(self.queue_depth)
+        password_hashing_in_progress.labels("bulk").set(self.bulk_in_progress)
+        password_hashing_queue_depth.labels("bulk").set(self.bulk_queue_depth)
+
+    @staticmethod
+    def _reject(pool: str, count: int = 1) -> HTTPException:
+        password_hashing_rejected.labels(pool).inc(count)
+        logger.warning(
+            f"Password hashing queue ({pool}) is full, rejecting the request"
+        )
+        return HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The server is busy, try again later",
+        )
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_workers + self.max_queue_size:
+            raise self._reject("regular")
+
+        self._pending += 1
+        self._update_gauges()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+            self._update_gauges()
+
+        password_hashing_completed.labels("regular").inc()
+        return result
+
+    def _finish_bulk(self, future: asyncio.Future) -> None:
+        self._bulk_pending -= 1
+        self._update_gauges()
+        if not future.cancelled() and future.exception() is None:
+            password_hashing_completed.labels("bulk").inc()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Hashes the passwords in the bulk pool. The whole list is rejected when
+        it doesn't fit into the queue, e.g. while other imports are running"""
+        capacity = self.bulk_max_workers + self.bulk_max_queue_size
+        if self._bulk_pending + len(passwords) > capacity:
+            raise self._reject("bulk", len(passwords))
+
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self._bulk_executor, self.pwd_context.hash, password)
+            for password in passwords
+        ]
+        self._bulk_pending += len(futures)
+        self._update_gauges()
+        # Called on cancellation too, so the counts don't leak if the import fails
+        for future in futures:
+            future.add_done_callback(self._finish_bulk)
+
+        return await asyncio.gather(*futures)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.pwd_context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, Optional[str]]:
+        """Verifies the password and returns its new hash if the hash is outdated
+        (e.g. the bcrypt cost has been changed)"""
+        return await self._run(
+            self.pwd_context.verify_and_update, plain_password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._bulk_executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    ),
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    max_queue_size=settings.PASSWORD_HASHING_MAX_QUEUE,
+    bulk_max_workers=settings.PASSWORD_BULK_HASHING_WORKERS,
+    bulk_max_queue_size=settings.PASSWORD_BULK_HASHING_MAX_QUEUE,
+)
@@ -5,6 +5,7 @@ from typing import Any
 
 from fastapi import HTTPException, status
 
+from app.core.unit_of_work import transactional
 from app.models.db.attempts import Attempt
 from app.models.db.quizzes import Question, QuestionTypeEnum, Quiz
 from app.models.schemas.attempts import AttemptQuestionAnswers
@@ -34,18 +35,9 @@ class AttemptService(BaseService):
         self.question_repository = question_repository
 
     async def _can_pass_quiz(self, user_id: int, quiz_id: int) -> bool:
-        user_tags_ids: list[int] = [
-            tag.id for tag in await self.tag_repository.get_user_tags(user_id)
-        ]
-        quiz_tags_ids: list[int] = [
-            tag.id for tag in await self.tag_repository.get_quiz_tags(quiz_id)
-        ]
-
-        for tag_id in user_tags_ids:
-            if tag_id in quiz_tags_ids:
-                return True
-        else:
-            return False
+        # User can pass the quiz if they share at least one tag
+        user_tag_ids = await self.tag_repository.get_user_tag_ids(user_id)
+        return await self.tag_repository.quiz_has_any_tag(quiz_id, user_tag_ids)
 
     async def _has_attempts(
         self, user_id: int, quiz_id: int, max_attempts_count: int
@@ -74,9 +66,13 @@ class AttemptService(BaseService):
     async def _validate_quiz_has_question(
         self, attempt_data: Attempt, question_id: int
     ) -> None:
-        has_question: bool = await self.quiz_repository.has_question(
-            attempt_data.quiz_id, question_id
-        )
+        # Attempts store the questions sampled from the quiz pool
+        if attempt_data.question_ids:
+            has_question: bool = question_id in attempt_data.question_ids
+        else:
+            has_question: bool = await self.quiz_repository.has_question(
+                attempt_data.quiz_id, question_id
+            )
         if not has_question:
             raise HTTPException(
                 status.HTTP_404_NOT_FOUND,
@@ -149,11 +145,12 @@ class AttemptService(BaseService):
         if question.type == QuestionTypeEnum.MultipleChoice:
             await self._validate_multiple_choice_answers(question, answers)
 
+    @transactional
     async def start_attempt(
         self, quiz_id: int, current_user_id: int
     ) -> StartAttemptResponse:
         await self._validate_instance_exists(self.quiz_repository, quiz_id)
-        quiz: Quiz = await self.quiz_repository.get_full_quiz(quiz_id)
+        quiz: Quiz = await self.quiz_repository.get_quiz_data(quiz_id)
         await self._validate_user_permissions(
             self.company_repository, quiz.company_id, current_user_id
         )
@@ -188,9 +185,19 @@ class AttemptService(BaseService):
                 ),
             )
 
+        # Draw the attempt questions from the quiz question pool
+        question_ids: list[int] = await self.quiz_repository.sample_question_ids(
+            quiz_id, quiz.questions_per_attempt
+        )
+        questions: list[Question] = await self.question_repository.get_questions_by_ids(
+            question_ids
+        )
+
         # Create a new attempt
-        attempt_id = await self.attempt_repository.create_attempt(current_user_id, quiz)
-        return StartAttemptResponse.from_model(attempt_id, quiz)
+        attempt_id = await self.attempt_repository.create_attempt(
+            current_user_id, quiz, question_ids
+        )
+        return StartAttemptResponse.from_model(attempt_id, quiz, questions)
 
     async def answer_question(
         self,
@@ -214,6 +221,7 @@ class AttemptService(BaseService):
             attempt_data, question_id, answers.answers
         )
 
+    @transactional
     async def finish_attempt(self, attempt_id: int, current_user_id: int) -> None:
         await self._validate_instance_exists(self.attempt_repository, attempt_id)
         attempt_data: Attempt = await self.attempt_repository.get_attempt_data(
@@ -222,24 +230,25 @@ class AttemptService(BaseService):
         await self._validate_attempt_user(attempt_data, current_user_id)
         await self._validate_attempt_is_ongoing(attempt_data)
 
+        # Attempts created before question pools were introduced contain all questions
+        question_ids: list[
+            int
+        ] = attempt_data.question_ids or await self.quiz_repository.get_questions_ids(
+            attempt_data.quiz_id
+        )
         raw_results: dict[str, str] = await self.attempt_repository.get_redis_answers(
-            attempt_id
+            attempt_id, question_ids
         )
         attempt_result: Decimal = 0
 
-        # Calculate attempt result
-        quiz_questions_ids: list[int] = await self.quiz_repository.get_questions_ids(
-            attempt_data.quiz_id
+        # Calculate attempt result (only answered questions are loaded)
+        answered_questions: list[
+            Question
+        ] = await self.question_repository.get_questions_by_ids(
+            [int(question_id) for question_id in raw_results]
         )
-        for question_id in quiz_questions_ids:
-            raw_answers = raw_results.get(str(question_id))
-            if not raw_answers:
-                continue
-
-            answers: list[Any] = json.loads(raw_answers)
-            question: Question = await self.question_repository.get_question_by_id(
-                question_id
-            )
+        for question in answered_questions:
+            answers: list[Any] = json.loads(raw_results[str(question.id)])
 
             if question.type == QuestionTypeEnum.OpenAnswer:
                 answer_title: str = question.answers[0].title
@@ -268,7 +277,8 @@ class AttemptService(BaseService):
         attempt_data.result = attempt_result
         await self.attempt_repository.save(attempt_data)
 
-        questions_count: int = await self.quiz_repository.get_questions_count(
-            attempt_data.quiz_id
-        )
-        return {"id": attempt_id, "result": attempt_result, "questions_count": questions_count}
+        return {
+            "id": attempt_id,
+            "result": attempt_result,
+            "questions_count": len(question_ids),
+        }
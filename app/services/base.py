@@ -4,9 +4,11 @@ from fastapi import HTTPException, status
 from pydantic import BaseModel
 
 from app.config.logs.logger import logger
+from app.core.tracing import trace_methods
+from app.core.unit_of_work import UnitOfWork
 from app.models.db.companies import RoleEnum
 from app.repository.base import BaseRepository
-from app.repository.company import CompanyMember, CompanyRepository
+from app.repository.company import CompanyRepository
 from app.repository.tag import TagRepository
 from app.repository.user import UserRepository
 from app.utilities.formatters.http_error import error_wrapper
@@ -14,6 +16,20 @@ from app.utilities.validators.permission.user import validate_user_company_role
 
 
 class BaseService:
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Every service method gets a span when tracing is enabled
+        trace_methods(cls)
+
+    @property
+    def unit_of_work(self) -> UnitOfWork:
+        # All the repositories of a request share the session and its unit of work
+        for value in vars(self).values():
+            if isinstance(value, BaseRepository):
+                return value.unit_of_work
+
+        raise RuntimeError(f"{type(self).__name__} has no repositories")
+
     async def _validate_instance_exists(
         self, repository: BaseRepository, instance_id: int
     ) -> None:
@@ -31,10 +47,10 @@ class BaseService:
         roles: Optional[tuple[RoleEnum]] = None,
         raise_exception: bool = True,
     ) -> None:
-        members: list[CompanyMember] = await company_repository.get_company_members(
-            company_id
+        role: Optional[RoleEnum] = await company_repository.get_member_role(
+            company_id, user_id
         )
-        is_member = validate_user_company_role(members, user_id, roles)
+        is_member = validate_user_company_role(role, roles)
         if not is_member and raise_exception:
             raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
@@ -86,3 +102,6 @@ class BaseService:
                     "tags",
                 ),
             )
+
+
+trace_methods(BaseService)
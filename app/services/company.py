@@ -1,8 +1,15 @@
-from typing import Any, Optional
+import hashlib
+from decimal import Decimal
+from typing import Any, AsyncIterator, Optional, Union
 
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
 
+from app.config.logs.logger import logger
+from app.config.settings.base import settings
+from app.core.cache import cache_get, cache_set
+from app.core.unit_of_work import transactional
 from app.models.db.companies import Company, CompanyUser, RoleEnum
 from app.models.db.users import TagUser, User
 from app.models.schemas.auth import UserSignUpOutput
@@ -11,15 +18,28 @@ from app.models.schemas.companies import (
     CompanyCreateSuccess,
     CompanyList,
     CompanyUpdate,
+    CompanyUsersPage,
+    CompanyUsersSearchResult,
 )
 from app.models.schemas.company_user import CompanyFullSchema, UserFullSchema
-from app.models.schemas.users import CompanyMemberInput, CompanyMemberUpdate, UserCreate
+from app.models.schemas.users import (
+    CompanyMemberInput,
+    CompanyMembersBulkUpdate,
+    CompanyMembersBulkUpdateOutput,
+    CompanyMemberUpdate,
+    MemberImportError,
+    MemberImportReport,
+    UserCreate,
+)
 from app.repository.company import CompanyRepository
 from app.repository.tag import TagRepository
 from app.repository.user import UserRepository
 from app.securities.authorization.auth_handler import auth_handler
 from app.services.base import BaseService
+from app.utilities.formatters.csv_stream import CSVRecordError
 from app.utilities.formatters.http_error import error_wrapper
+from app.utilities.http.cursor import decode_cursor, encode_cursor
+from app.utilities.http.etag import make_etag
 
 
 class CompanyService(BaseService):
@@ -44,6 +64,7 @@ class CompanyService(BaseService):
                 detail=error_wrapper(error_message, "member_id"),
             )
 
+    @transactional
     async def create_company(
         self, company_data: CompanyCreate, current_user: User
     ) -> CompanyCreateSuccess:
@@ -80,22 +101,82 @@ class CompanyService(BaseService):
 
         return []
 
+    async def get_company_version(self, company_id: int) -> int:
+        version: Optional[int] = await self.company_repository.get_company_version(
+            company_id
+        )
+        if version is None:
+            raise HTTPException(
+                status.HTTP_404_NOT_FOUND, detail="Company is not found"
+            )
+
+        return version
+
+    @staticmethod
+    def _get_page_hash(filter_string: str, limit: Optional[int], offset: int) -> str:
+        # Each members filter and page produces a separate representation of the company
+        return hashlib.sha1(
+            f"{filter_string or ''}:{limit}:{offset}".encode()
+        ).hexdigest()[:12]
+
+    def get_company_etag(
+        self,
+        company_id: int,
+        version: int,
+        filter_string: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> str:
+        page_hash = self._get_page_hash(filter_string, limit, offset)
+        return make_etag("company", company_id, version, page_hash)
+
+    async def _get_company_details(
+        self,
+        company_id: int,
+        filter_string: str = "",
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> CompanyFullSchema:
+        details = await self.company_repository.get_company_details(
+            company_id, filter_string, limit, offset
+        )
+        if details is None:
+            raise HTTPException(
+                status.HTTP_404_NOT_FOUND, detail="Company is not found"
+            )
+
+        return CompanyFullSchema.from_details(details)
+
     async def get_company_by_id(
-        self, company_id: int, filter_string: str
+        self,
+        company_id: int,
+        filter_string: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        version: Optional[int] = None,
     ) -> CompanyFullSchema:
-        await self._validate_instance_exists(self.company_repository, company_id)
+        # The version already resolved for the ETag is reused
+        if version is None:
+            version = await self.get_company_version(company_id)
 
-        # Retrieve company owner instance
-        owner = await self.company_repository.get_company_owner(company_id)
+        # Every change of the company page bumps the version, so the cached pages
+        # of the previous versions are never read again and just expire
+        page_hash = self._get_page_hash(filter_string, limit, offset)
+        cache_key = f"company:{company_id}:v{version}:details:{page_hash}"
 
-        # Retrieve company staff count
-        staff_count = len(await self.company_repository.get_company_members(company_id))
+        cached_company: Optional[str] = await cache_get(cache_key)
+        if cached_company:
+            return CompanyFullSchema.model_validate_json(cached_company)
 
-        company = await self.company_repository.get_company_by_id(
-            company_id, filter_string
+        company = await self._get_company_details(
+            company_id, filter_string, limit, offset
+        )
+        await cache_set(
+            cache_key, company.model_dump_json(), settings.COMPANY_DETAILS_CACHE_TTL
         )
-        return CompanyFullSchema.from_model(company, staff_count, owner)
+        return company
 
+    @transactional
     async def update_company(
         self, company_id: int, company_data: CompanyUpdate, current_user_id: int
     ) -> CompanyFullSchema:
@@ -110,17 +191,7 @@ class CompanyService(BaseService):
 
         try:
             await self.company_repository.update_company(company_id, company_data)
-            updated_company: Company = await self.company_repository.get_company_by_id(
-                company_id
-            )
-            # Retrieve company owner instance
-            owner = await self.company_repository.get_company_owner(company_id)
-
-            # Retrieve company staff count
-            staff_count = len(
-                await self.company_repository.get_company_members(company_id)
-            )
-            return CompanyFullSchema.from_model(updated_company, staff_count, owner)
+            return await self._get_company_details(company_id)
         except IntegrityError:
             raise HTTPException(
                 status.HTTP_409_CONFLICT,
@@ -145,6 +216,54 @@ class CompanyService(BaseService):
         user = await self.user_repository.get_user_by_id(member_id)
         return UserFullSchema.from_model(user)
 
+    async def search_members(
+        self,
+        company_id: int,
+        search_string: str,
+        limit: int,
+        cursor: Optional[str],
+        current_user_id: int,
+    ) -> CompanyUsersPage:
+        await self._validate_instance_exists(self.company_repository, company_id)
+        await self._validate_user_permissions(
+            self.company_repository,
+            company_id,
+            current_user_id,
+        )
+
+        search_string = search_string.strip()
+        if not search_string:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper("Search query can't be empty", "query"),
+            )
+
+        after: Optional[tuple[Decimal, int]] = None
+        if cursor:
+            after_score, after_id = decode_cursor(cursor, 2)
+            try:
+                after = (Decimal(after_score), int(after_id))
+            except (ArithmeticError, TypeError, ValueError):
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST,
+                    detail=error_wrapper("Invalid cursor", "cursor"),
+                )
+
+        # One extra member tells if there is a next page
+        members = await self.company_repository.search_company_members(
+            company_id, search_string, limit + 1, after
+        )
+        next_cursor: Optional[str] = None
+        if len(members) > limit:
+            members = members[:limit]
+            next_cursor = encode_cursor(str(members[-1]["score"]), members[-1]["id"])
+
+        return CompanyUsersPage(
+            users=[CompanyUsersSearchResult(**member) for member in members],
+            next_cursor=next_cursor,
+        )
+
+    @transactional
     async def add_member(
         self, company_id: int, member_data: CompanyMemberInput, current_user_id: int
     ) -> UserSignUpOutput:
@@ -160,7 +279,9 @@ class CompanyService(BaseService):
         await self._validate_tag_ids(self.tag_repository, member_data, company_id)
 
         # Hash user password
-        member_data.password = auth_handler.get_password_hash(member_data.password)
+        member_data.password = await auth_handler.password_hasher.hash(
+            member_data.password
+        )
 
         try:
             # Create new company member database instances
@@ -183,9 +304,10 @@ class CompanyService(BaseService):
             ]
 
             # Save new M2M objects explicitly
-            await self.company_repository.save(new_company_user)
-            for tag_user in new_tag_users:
-                await self.tag_repository.save(tag_user)
+            await self.company_repository.add_member(new_company_user, new_tag_users)
+            await self.company_repository.invalidate_member_role(
+                company_id, new_user.get("id")
+            )
 
             return new_user
         except IntegrityError:
@@ -194,6 +316,193 @@ class CompanyService(BaseService):
                 detail=error_wrapper("User with this email already exists", "email"),
             )
 
+    def _parse_import_record(
+        self, record: dict[str, str], company_tag_ids: set[int]
+    ) -> CompanyMemberInput:
+        try:
+            tags = [
+                int(tag_id) for tag_id in record.get("tags", "").split(";") if tag_id
+            ]
+        except ValueError:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper(
+                    "Tag ids should be integers separated by ';'", "tags"
+                ),
+            )
+
+        member_data = CompanyMemberInput(
+            email=record.get("email", ""),
+            name=record.get("name") or None,
+            phone_number=record.get("phone_number") or None,
+            password=record.get("password", ""),
+            role=record.get("role", "").lower(),
+            tags=tags,
+        )
+
+        if member_data.role not in ["admin", "tester", "employee"]:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper("Invalid role", "role"),
+            )
+        if not member_data.tags:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper("At least one tag id should be provided", "tags"),
+            )
+        if len(set(member_data.tags)) != len(member_data.tags):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper("Tag ids should not be duplicated", "tags"),
+            )
+        if not set(member_data.tags) <= company_tag_ids:
+            raise HTTPException(
+                status.HTTP_404_NOT_FOUND,
+                detail=error_wrapper(
+                    "One or more tags are not found within the company", "tags"
+                ),
+            )
+
+        return member_data
+
+    async def _import_members_batch(
+        self, company_id: int, batch: list[tuple[int, CompanyMemberInput]]
+    ) -> tuple[int, list[MemberImportError]]:
+        try:
+            passwords = await auth_handler.password_hasher.hash_many(
+                [member_data.password for _, member_data in batch]
+            )
+        except HTTPException as error:
+            # The bulk hashing queue is full, the rows can be imported again later
+            return 0, [
+                MemberImportError(
+                    row=row, email=member_data.email, message=error.detail
+                )
+                for row, member_data in batch
+            ]
+        members = [
+            {
+                "email": member_data.email,
+                "name": member_data.name,
+                "phone_number": member_data.phone_number,
+                "password": password,
+                "role": RoleEnum(member_data.role),
+                "tags": member_data.tags,
+            }
+            for (_, member_data), password in zip(batch, passwords)
+        ]
+
+        try:
+            user_ids = await self.company_repository.import_members(company_id, members)
+        except IntegrityError as error:
+            logger.warning(f"Unable to import the members batch: {error}")
+            return 0, [
+                MemberImportError(
+                    row=row, email=member_data.email, message="Unable to import the row"
+                )
+                for row, member_data in batch
+            ]
+
+        errors = [
+            MemberImportError(
+                row=row,
+                email=member_data.email,
+                message="User with this email already exists",
+                field="email",
+            )
+            for row, member_data in batch
+            if member_data.email not in user_ids
+        ]
+        return len(user_ids), errors
+
+    async def import_members(
+        self,
+        company_id: int,
+        records: AsyncIterator[tuple[int, Union[dict[str, str], CSVRecordError]]],
+        current_user_id: int,
+    ) -> MemberImportReport:
+        await self._validate_instance_exists(self.company_repository, company_id)
+        await self._validate_user_permissions(
+            self.company_repository,
+            company_id,
+            current_user_id,
+            (RoleEnum.Owner, RoleEnum.Admin),
+        )
+
+        company_tag_ids = set(
+            await self.tag_repository.get_company_tags(
+                company_id, use_local_cache=False
+            )
+        )
+
+        created = 0
+        errors: list[MemberImportError] = []
+        batch: list[tuple[int, CompanyMemberInput]] = []
+        seen_emails: set[str] = set()
+
+        async for row, record in records:
+            if isinstance(record, CSVRecordError):
+                errors.append(MemberImportError(row=row, message=record.message))
+                continue
+
+            try:
+                member_data = self._parse_import_record(record, company_tag_ids)
+            except ValidationError as error:
+                first_error = error.errors()[0]
+                errors.append(
+                    MemberImportError(
+                        row=row,
+                        email=record.get("email"),
+                        message=first_error["msg"],
+                        field=".".join(str(loc) for loc in first_error["loc"]),
+                    )
+                )
+                continue
+            except HTTPException as error:
+                detail = (
+                    error.detail
+                    if isinstance(error.detail, dict)
+                    else error_wrapper(str(error.detail), None)
+                )
+                errors.append(
+                    MemberImportError(row=row, email=record.get("email"), **detail)
+                )
+                continue
+
+            if member_data.email in seen_emails:
+                errors.append(
+                    MemberImportError(
+                        row=row,
+                        email=member_data.email,
+                        message="Email is duplicated in the file",
+                        field="email",
+                    )
+                )
+                continue
+            seen_emails.add(member_data.email)
+
+            batch.append((row, member_data))
+            if len(batch) >= settings.MEMBER_IMPORT_BATCH_SIZE:
+                batch_created, batch_errors = await self._import_members_batch(
+                    company_id, batch
+                )
+                created += batch_created
+                errors.extend(batch_errors)
+                batch = []
+
+        if batch:
+            batch_created, batch_errors = await self._import_members_batch(
+                company_id, batch
+            )
+            created += batch_created
+            errors.extend(batch_errors)
+
+        logger.info(
+            f'Imported {created} members into company "{company_id}", {len(errors)} rows failed'
+        )
+        return MemberImportReport(created=created, failed=len(errors), errors=errors)
+
+    @transactional
     async def update_member(
         self,
         company_id: int,
@@ -230,6 +539,8 @@ class CompanyService(BaseService):
             await self._validate_passed_role(member_data)
             member.companies[0].role = RoleEnum(member_data.role)
             await self.user_repository.save(member)
+            await self.company_repository.bump_version(company_id)
+            await self.company_repository.invalidate_member_role(company_id, member_id)
 
         if member_data.tags is not None:
             await self._validate_tag_ids(self.tag_repository, member_data, company_id)
@@ -239,10 +550,90 @@ class CompanyService(BaseService):
             await self.user_repository.save_many(
                 [TagUser(user_id=member_id, tag_id=tag) for tag in member_data.tags]
             )
+            await self.tag_repository.invalidate_user_tag_ids([member_id])
 
         new_member = await self.user_repository.get_user_by_id(member_id)
         return UserFullSchema.from_model(new_member)
 
+    @transactional
+    async def bulk_update_members(
+        self,
+        company_id: int,
+        members_data: CompanyMembersBulkUpdate,
+        current_user_id: int,
+    ) -> CompanyMembersBulkUpdateOutput:
+        await self._validate_instance_exists(self.company_repository, company_id)
+        await self._validate_user_permissions(
+            self.company_repository,
+            company_id,
+            current_user_id,
+            (RoleEnum.Owner, RoleEnum.Admin),
+        )
+        members_data.member_ids = list(dict.fromkeys(members_data.member_ids))
+        self._validate_update_data(members_data.model_copy(update={"member_ids": None}))
+
+        if members_data.replace_tags is not None and (
+            members_data.add_tags or members_data.remove_tags
+        ):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper(
+                    "Tags can't be replaced and added or removed at the same time",
+                    "replace_tags",
+                ),
+            )
+
+        # Validate if user tries to update its data
+        if current_user_id in members_data.member_ids:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper(
+                    "You can't change your own company data", "member_ids"
+                ),
+            )
+
+        # Validate if all the users are company members and none of them is the owner
+        roles = await self.company_repository.get_members_roles(
+            company_id, members_data.member_ids
+        )
+        missing_ids = [
+            member_id for member_id in members_data.member_ids if member_id not in roles
+        ]
+        if missing_ids:
+            raise HTTPException(
+                status.HTTP_404_NOT_FOUND,
+                detail=error_wrapper(
+                    f"Users {missing_ids} are not the company members", "member_ids"
+                ),
+            )
+        if RoleEnum.Owner in roles.values():
+            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+        if members_data.role:
+            await self._validate_passed_role(members_data)
+        for field in ["add_tags", "replace_tags"]:
+            tags = getattr(members_data, field)
+            if tags is not None:
+                await self._validate_tag_ids(
+                    self.tag_repository, CompanyMemberUpdate(tags=tags), company_id
+                )
+
+        await self.company_repository.bulk_update_members(
+            company_id,
+            members_data.member_ids,
+            role=RoleEnum(members_data.role) if members_data.role else None,
+            add_tags=members_data.add_tags,
+            remove_tags=members_data.remove_tags,
+            replace_tags=members_data.replace_tags,
+        )
+        await self.company_repository.invalidate_members_roles(
+            company_id, members_data.member_ids
+        )
+        await self.tag_repository.invalidate_user_tag_ids(members_data.member_ids)
+
+        return CompanyMembersBulkUpdateOutput(updated=len(members_data.member_ids))
+
+    @transactional
     async def delete_member(self, company_id, member_id, current_user_id) -> None:
         await self._validate_instance_exists(self.company_repository, company_id)
         await self._validate_user_permissions(
@@ -263,9 +654,11 @@ class CompanyService(BaseService):
         )
 
         # Validate if member user is not the owner
-        company_members = await self.company_repository.get_company_members(company_id)
-        for member in company_members:
-            if member.id == member_id and member.role == RoleEnum.Owner:
-                raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Forbidden")
+        member_role = await self.company_repository.get_member_role(
+            company_id, member_id
+        )
+        if member_role == RoleEnum.Owner:
+            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
-        await self.user_repository.delete_user(member_id)
+        await self.company_repository.delete_member(company_id, member_id)
+        await self.company_repository.invalidate_member_role(company_id, member_id)
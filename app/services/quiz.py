@@ -1,12 +1,14 @@
 import uuid
 from datetime import datetime
+from typing import Optional
 
 from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
 
+from app.core.unit_of_work import transactional
 from app.models.db.companies import RoleEnum
 from app.models.db.quizzes import Question, QuestionTypeEnum, Quiz
-from app.models.db.users import Tag, TagQuiz
+from app.models.db.users import TagQuiz
 from app.models.schemas.quizzes import (
     AnswerBaseSchema,
     QuestionCreateInput,
@@ -19,12 +21,13 @@ from app.models.schemas.quizzes import (
     QuizListSchema,
     QuizUpdate,
 )
-from app.repository.company import CompanyMember, CompanyRepository
+from app.repository.company import CompanyRepository
 from app.repository.question import QuestionRepository
-from app.repository.quiz import QuizRepository
+from app.repository.quiz import QuizRepository, QuizVersion
 from app.repository.tag import TagRepository
 from app.services.base import BaseService
 from app.utilities.formatters.http_error import error_wrapper, question_error_wrapper
+from app.utilities.http.etag import make_etag
 
 
 class QuizService(BaseService):
@@ -238,6 +241,35 @@ class QuizService(BaseService):
             self._validate_duplicate_answers(question)
             self._validate_correct_answers_count(question)
 
+    def _validate_questions_per_attempt(
+        self, questions_per_attempt: Optional[int], questions_count: int
+    ) -> None:
+        # Validate the quiz pool is big enough to draw questions for an attempt
+        if questions_per_attempt and questions_per_attempt > questions_count:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper(
+                    "Questions per attempt can't exceed the amount of quiz questions",
+                    "questions_per_attempt",
+                ),
+            )
+
+    async def get_quiz_etag(self, quiz_id: int, current_user_id: int) -> str:
+        # Resolves quiz existence, version and user role with a single lookup
+        quiz_version: Optional[
+            QuizVersion
+        ] = await self.quiz_repository.get_quiz_version(quiz_id, current_user_id)
+        if not quiz_version:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Quiz is not found")
+        if not quiz_version.role:
+            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+        # Employees receive a reduced representation of the quiz
+        representation = (
+            "employee" if quiz_version.role == RoleEnum.Employee else "full"
+        )
+        return make_etag("quiz", quiz_id, quiz_version.version, representation)
+
     async def get_quiz(
         self, quiz_id: int, current_user_id: int
     ) -> QuizFullSchema | QuizEmployeeSchema:
@@ -247,15 +279,13 @@ class QuizService(BaseService):
             self.company_repository, quiz.company_id, current_user_id
         )
 
-        current_user_data: CompanyMember = list(
-            filter(
-                lambda member: member.id == current_user_id,
-                await self.company_repository.get_company_members(quiz.company_id),
-            )
-        )[0]
+        # Resolved from the cache populated by the permissions validation
+        current_user_role: RoleEnum = await self.company_repository.get_member_role(
+            quiz.company_id, current_user_id
+        )
 
         # Define what data has to be returned depending on user role
-        if current_user_data.role == RoleEnum.Employee:
+        if current_user_role == RoleEnum.Employee:
             return QuizEmployeeSchema.from_model(quiz)
 
         return QuizFullSchema.from_model(quiz)
@@ -289,16 +319,17 @@ class QuizService(BaseService):
             current_user_id,
         )
 
-        user_tags: list[Tag] = await self.tag_repository.get_user_tags(current_user_id)
+        user_tag_ids = await self.tag_repository.get_user_tag_ids(current_user_id)
 
         user_quizzes: list[Quiz] = await self.quiz_repository.get_member_quizzes(
-            company_id, user_tags
+            company_id, user_tag_ids
         )
         return [
             QuizListSchema.model_validate(quiz, from_attributes=True)
             for quiz in user_quizzes
         ]
 
+    @transactional
     async def create_quiz(
         self, quiz_data: QuizCreateInput, current_user_id: int
     ) -> QuizCreateOutput:
@@ -316,6 +347,9 @@ class QuizService(BaseService):
             self.tag_repository, quiz_data, quiz_data.company_id
         )
         await self._validate_quiz_questions(quiz_data.questions)
+        self._validate_questions_per_attempt(
+            quiz_data.questions_per_attempt, len(quiz_data.questions)
+        )
 
         try:
             quiz_tags = quiz_data.tags
@@ -346,11 +380,21 @@ class QuizService(BaseService):
                 ),
             )
 
+    @transactional
     async def update_quiz(
         self, quiz_id: int, quiz_data: QuizUpdate, current_user_id: int
     ) -> QuizFullSchema:
         await self._validate_instance_exists(self.quiz_repository, quiz_id)
-        self._validate_update_data(quiz_data)
+
+        # An explicit null turns the question pool back into a full quiz
+        clear_fields = (
+            ["questions_per_attempt"]
+            if "questions_per_attempt" in quiz_data.model_fields_set
+            and quiz_data.questions_per_attempt is None
+            else []
+        )
+        if not clear_fields:
+            self._validate_update_data(quiz_data)
 
         existing_quiz_data: Quiz = await self.quiz_repository.get_quiz_data(quiz_id)
         await self._validate_user_permissions(
@@ -369,6 +413,12 @@ class QuizService(BaseService):
                 self._validate_update_quiz_deadlines(quiz_data, existing_quiz_data)
                 break
 
+        if quiz_data.questions_per_attempt is not None:
+            self._validate_questions_per_attempt(
+                quiz_data.questions_per_attempt,
+                await self.quiz_repository.get_questions_count(quiz_id),
+            )
+
         if quiz_data.tags:
             await self._validate_tag_ids(
                 self.tag_repository, quiz_data, existing_quiz_data.company_id
@@ -384,8 +434,8 @@ class QuizService(BaseService):
         try:
             # Validate if 'tags' field was the only field
             # (if so all fields will be None in quiz_data and an SQL exception will occur)
-            if not quiz_data.are_all_attributes_none():
-                await self.quiz_repository.update_quiz(quiz_id, quiz_data)
+            if clear_fields or not quiz_data.are_all_attributes_none():
+                await self.quiz_repository.update_quiz(quiz_id, quiz_data, clear_fields)
             updated_quiz: Quiz = await self.quiz_repository.get_full_quiz(quiz_id)
 
             return QuizFullSchema.from_model(updated_quiz)
@@ -397,6 +447,7 @@ class QuizService(BaseService):
                 ),
             )
 
+    @transactional
     async def update_question(
         self, question_id: int, question_data: QuestionUpdate, current_user_id: int
     ) -> QuestionSchema:
@@ -451,6 +502,7 @@ class QuizService(BaseService):
                 ),
             )
 
+    @transactional
     async def delete_question(self, question_id: int, current_user_id: int) -> None:
         await self._validate_instance_exists(self.question_repository, question_id)
 
@@ -480,8 +532,23 @@ class QuizService(BaseService):
                 ),
             )
 
+        # Validate that the pool will still be big enough for an attempt
+        quiz: Quiz = await self.quiz_repository.get_quiz_data(question.quiz_id)
+        if (
+            quiz.questions_per_attempt
+            and current_questions_count - 1 < quiz.questions_per_attempt
+        ):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper(
+                    "The quiz should have at least as many questions as drawn for an attempt",
+                    None,
+                ),
+            )
+
         await self.question_repository.delete_question(question_id)
 
+    @transactional
     async def delete_quiz(self, quiz_id: int, current_user_id: int) -> None:
         await self._validate_instance_exists(self.quiz_repository, quiz_id)
 
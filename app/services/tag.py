@@ -1,9 +1,11 @@
 from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
 
+from app.core.unit_of_work import transactional
 from app.models.db.companies import RoleEnum
 from app.models.db.users import Tag
 from app.models.schemas.tags import (
+    TagAssignmentOutput,
     TagBaseSchema,
     TagCreateInput,
     TagCreateOutput,
@@ -21,6 +23,7 @@ class TagService(BaseService):
         self.tag_repository: TagRepository = tag_repository
         self.company_repository: CompanyRepository = company_repository
 
+    @transactional
     async def create_tag(
         self, tag_data: TagCreateInput, current_user_id: int
     ) -> TagCreateInput:
@@ -53,9 +56,8 @@ class TagService(BaseService):
             self.company_repository, company_id, current_user_id
         )
 
-        tags: list[Tag] = await self.tag_repository.get_company_tags(company_id)
-        print(tags)
-        return [TagBaseSchema(id=tag.id, title=tag.title) for tag in tags]
+        tags: dict[int, str] = await self.tag_repository.get_company_tags(company_id)
+        return [TagBaseSchema(id=tag_id, title=title) for tag_id, title in tags.items()]
 
     async def get_tag_by_id(self, current_user_id: int, tag_id: int) -> TagSchema:
         await self._validate_instance_exists(self.tag_repository, tag_id)
@@ -72,6 +74,7 @@ class TagService(BaseService):
             description=tag.description,
         )
 
+    @transactional
     async def update_tag(
         self, tag_id: int, tag_data: TagUpdateInput, current_user_id: int
     ) -> TagSchema:
@@ -102,6 +105,7 @@ class TagService(BaseService):
                 ),
             )
 
+    @transactional
     async def delete_tag(self, tag_id: int, current_user_id: int) -> None:
         await self._validate_instance_exists(self.tag_repository, tag_id)
 
@@ -115,3 +119,78 @@ class TagService(BaseService):
         )
 
         await self.tag_repository.delete_tag(tag_id)
+
+    async def _get_managed_tag(self, tag_id: int, current_user_id: int) -> Tag:
+        await self._validate_instance_exists(self.tag_repository, tag_id)
+
+        tag = await self.tag_repository.get_tag_by_id(tag_id)
+
+        await self._validate_user_permissions(
+            self.company_repository,
+            tag.company_id,
+            current_user_id,
+            (RoleEnum.Owner, RoleEnum.Admin),
+        )
+        return tag
+
+    @transactional
+    async def attach_to_users(
+        self, tag_id: int, user_ids: list[int], current_user_id: int
+    ) -> TagAssignmentOutput:
+        tag = await self._get_managed_tag(tag_id, current_user_id)
+
+        affected = await self.tag_repository.attach_to_users(
+            tag_id, tag.company_id, list(set(user_ids))
+        )
+        return TagAssignmentOutput(affected=affected)
+
+    @transactional
+    async def detach_from_users(
+        self, tag_id: int, user_ids: list[int], current_user_id: int
+    ) -> TagAssignmentOutput:
+        await self._get_managed_tag(tag_id, current_user_id)
+
+        user_ids = list(set(user_ids))
+        if await self.tag_repository.get_users_with_only_tag(tag_id, user_ids):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper(
+                    "The users should keep at least one tag, "
+                    "attach another tag before detaching this one",
+                    "ids",
+                ),
+            )
+
+        affected = await self.tag_repository.detach_from_users(tag_id, user_ids)
+        return TagAssignmentOutput(affected=affected)
+
+    @transactional
+    async def attach_to_quizzes(
+        self, tag_id: int, quiz_ids: list[int], current_user_id: int
+    ) -> TagAssignmentOutput:
+        tag = await self._get_managed_tag(tag_id, current_user_id)
+
+        affected = await self.tag_repository.attach_to_quizzes(
+            tag_id, tag.company_id, list(set(quiz_ids))
+        )
+        return TagAssignmentOutput(affected=affected)
+
+    @transactional
+    async def detach_from_quizzes(
+        self, tag_id: int, quiz_ids: list[int], current_user_id: int
+    ) -> TagAssignmentOutput:
+        await self._get_managed_tag(tag_id, current_user_id)
+
+        quiz_ids = list(set(quiz_ids))
+        if await self.tag_repository.get_quizzes_with_only_tag(tag_id, quiz_ids):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=error_wrapper(
+                    "The quizzes should keep at least one tag, "
+                    "attach another tag before detaching this one",
+                    "ids",
+                ),
+            )
+
+        affected = await self.tag_repository.detach_from_quizzes(tag_id, quiz_ids)
+        return TagAssignmentOutput(affected=affected)
@@ -8,6 +8,7 @@ from app.config.logs.logger import logger
 from app.config.settings.base import settings
 from app.core.database import redis
 from app.core.tasks import send_email_report_dashboard
+from app.core.unit_of_work import transactional
 from app.models.db.users import User
 from app.models.schemas.auth import (
     UserLoginInput,
@@ -32,11 +33,12 @@ class UserService(BaseService):
     def __init__(self, user_repository) -> None:
         self.user_repository: UserRepository = user_repository
 
+    @transactional
     async def register_user(self, user_data: UserSignUpInput) -> UserSignUpOutput:
         logger.info("Creating new User instance")
 
         # Hashing input password
-        user_data.password = auth_handler.get_password_hash(user_data.password)
+        user_data.password = await auth_handler.password_hasher.hash(user_data.password)
 
         try:
             result = await self.user_repository.create_user(
@@ -51,6 +53,7 @@ class UserService(BaseService):
         logger.info("New user instance has been successfully created")
         return result
 
+    @transactional
     async def authenticate_user(self, user_data: UserLoginInput) -> UserLoginOutput:
         logger.info(f'Login attempt with email "{user_data.email}"')
 
@@ -66,9 +69,18 @@ class UserService(BaseService):
                 detail="User with this email is not registered in the system",
             )
 
-        verify_password = auth_handler.verify_password(
-            user_data.password, user_existing_object.password
-        )
+        # Computing the upgraded hash costs another bcrypt run, so it is only
+        # done when it is going to be saved
+        hasher = auth_handler.password_hasher
+        new_password_hash = None
+        if settings.PASSWORD_REHASH_ON_LOGIN:
+            verify_password, new_password_hash = await hasher.verify_and_update(
+                user_data.password, user_existing_object.password
+            )
+        else:
+            verify_password = await hasher.verify(
+                user_data.password, user_existing_object.password
+            )
         if not verify_password:
             logger.warning("Invalid password was provided")
             raise HTTPException(
@@ -76,6 +88,12 @@ class UserService(BaseService):
                 detail=error_wrapper("Invalid password", "password"),
             )
 
+        # Upgrade the password hash if the hashing parameters have been changed
+        if new_password_hash:
+            user_existing_object.password = new_password_hash
+            await self.user_repository.save(user_existing_object)
+            logger.info(f'Password hash of "{user_data.email}" has been upgraded')
+
         logger.info(f'User "{user_data.email}" successfully logged in the system')
         auth_token = auth_handler.encode_token(user_existing_object.id, user_data.email)
         return {"token": auth_token}
@@ -85,6 +103,7 @@ class UserService(BaseService):
 
         return UserFullSchema.from_model(current_user)
 
+    @transactional
     async def update_user_profile(
         self, current_user: User, data: UserUpdate
     ) -> UserFullSchema:
@@ -98,13 +117,16 @@ class UserService(BaseService):
         logger.info(f'"{current_user}" profile was successfully updated')
         return await self.get_user_profile(updated_user)
 
+    @transactional
     async def reset_password(
         self, current_user: User, data: PasswordResetInput
     ) -> PasswordChangeOutput:
         logger.info(f'Change password request from user "{current_user}"')
 
         # Validate the old password match the current one
-        if not auth_handler.verify_password(data.old_password, current_user.password):
+        if not await auth_handler.password_hasher.verify(
+            data.old_password, current_user.password
+        ):
             logger.warning("Invalid old password was provided")
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST,
@@ -112,13 +134,17 @@ class UserService(BaseService):
             )
 
         # Validate the new password does not match the old password
-        if auth_handler.verify_password(data.new_password, current_user.password):
+        if await auth_handler.password_hasher.verify(
+            data.new_password, current_user.password
+        ):
             logger.warning("Error: New password and old password are the same")
             raise HTTPException(
                 status.HTTP_409_CONFLICT, detail="You can't use your old password"
             )
 
-        current_user.password = auth_handler.get_password_hash(data.new_password)
+        current_user.password = await auth_handler.password_hasher.hash(
+            data.new_password
+        )
 
         await self.user_repository.save(current_user)
         logger.info("The password was successfully updated")
@@ -157,6 +183,7 @@ class UserService(BaseService):
 
         return {"status": "Valid"}
 
+    @transactional
     async def reset_forgotten_password(
         self, new_password: str, code: str
     ) -> dict[str, str]:
@@ -165,7 +192,7 @@ class UserService(BaseService):
         user_email: EmailStr = (await redis.get(code)).split("-")[-1]
         user_to_update = await self.user_repository.get_user_by_email(user_email)
 
-        user_to_update.password = auth_handler.get_password_hash(new_password)
+        user_to_update.password = await auth_handler.password_hasher.hash(new_password)
 
         await self.user_repository.save(user_to_update)
         logger.info("The password was successfully updated")
@@ -1,16 +1,18 @@
-from typing import Any, Optional
+from typing import Any
 
 from app.repository.user import UserRepository
+from app.securities.authorization.identity_cache import identity_cache
 
 
 async def create_user_or_skip(
-    user_repository: UserRepository, user_data: dict[str, bool]
-) -> Optional[dict[str, Any]]:
-    new_user: Optional[dict[str, Any]] = await user_repository.create_or_skip(
-        user_data["email"]
-    )
+    user_repository: UserRepository, user_data: dict[str, Any]
+) -> dict[str, Any]:
+    # Resolve the Auth0 user id from the cache, creating the user if needed
+    user_id = identity_cache.get_auth0_user_id(user_data["email"])
+    if user_id is None:
+        user_id = await user_repository.create_or_skip(user_data["email"])
+        identity_cache.set_auth0_user_id(user_data["email"], user_id)
 
-    # Add new user id to the user_data
-    if new_user:
-        user_data["id"] = new_user["id"]
-        return user_data
+    # Add user id to the user_data
+    user_data["id"] = user_id
+    return user_data
@@ -0,0 +1,120 @@
+import csv
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import AsyncIterator, Optional, Union
+
+# Longest record kept in memory while waiting for its quotes to be closed
+MAX_RECORD_LENGTH = 64 * 1024
+
+
+@dataclass
+class CSVRecordError:
+    """A record that can't be parsed, reported instead of the record values"""
+
+    message: str
+
+
+class _State(Enum):
+    START_FIELD = auto()
+    IN_FIELD = auto()
+    IN_QUOTED_FIELD = auto()
+    QUOTE_IN_QUOTED_FIELD = auto()
+
+
+def _scan_quotes(line: str, state: _State) -> _State:
+    """Follows the quoting rules of the csv module (the quote character opens a
+    quoted value only at the start of a field), so that a stray quote inside an
+    unquoted value doesn't swallow the following lines"""
+    for char in line:
+        if state is _State.IN_QUOTED_FIELD:
+            if char == '"':
+                state = _State.QUOTE_IN_QUOTED_FIELD
+        elif char == ",":
+            state = _State.START_FIELD
+        elif state is _State.START_FIELD and char == '"':
+            state = _State.IN_QUOTED_FIELD
+        elif state is _State.QUOTE_IN_QUOTED_FIELD and char == '"':
+            # Escaped quote
+            state = _State.IN_QUOTED_FIELD
+        else:
+            state = _State.IN_FIELD
+    return state
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *complete_lines, buffer = buffer.split(b"\n")
+        for line in complete_lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def iter_csv_records(
+    chunks: AsyncIterator[bytes],
+    encoding: str = "utf-8-sig",
+    max_record_length: int = MAX_RECORD_LENGTH,
+) -> AsyncIterator[tuple[int, Union[dict[str, str], CSVRecordError]]]:
+    """Parses a streamed CSV file with a header row without loading it into memory
+
+    Yields the line number every record starts at and the record mapped to the
+    (lowercased) header names. Records that can't be parsed are yielded as
+    CSVRecordError. Every line is decoded separately (the encoding has to keep
+    the ASCII line breaks, as UTF-8 does), so an invalid byte only breaks its row
+    """
+    header: Optional[list[str]] = None
+    record_lines: list[str] = []
+    record_length = 0
+    record_start = line_number = 0
+    state = _State.START_FIELD
+
+    async for raw_line in _iter_lines(chunks):
+        line_number += 1
+        try:
+            line = raw_line.decode(encoding)
+        except UnicodeDecodeError:
+            yield record_start if record_lines else line_number, CSVRecordError(
+                f"The record can't be decoded as {encoding}"
+            )
+            record_lines, record_length = [], 0
+            continue
+
+        if not record_lines:
+            record_start = line_number
+            state = _State.START_FIELD
+        record_lines.append(line)
+        record_length += len(line)
+
+        # Quoted values may contain line breaks, so the record is complete only
+        # once its quoted value is closed
+        state = _scan_quotes(line, state)
+        if state is _State.IN_QUOTED_FIELD:
+            if record_length > max_record_length:
+                record_lines, record_length = [], 0
+                yield record_start, CSVRecordError(
+                    "The record is too long, check that its quotes are closed"
+                )
+            continue
+
+        record_text = "\n".join(record_lines)
+        record_lines, record_length = [], 0
+
+        try:
+            values = next(csv.reader([record_text]), [])
+        except csv.Error as error:
+            yield record_start, CSVRecordError(f"Invalid record: {error}")
+            continue
+
+        if not any(value.strip() for value in values):
+            continue
+
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+
+        yield record_start, {name: value.strip() for name, value in zip(header, values)}
+
+    if record_lines:
+        yield record_start, CSVRecordError("The record has an unclosed quote")
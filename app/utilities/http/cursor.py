@@ -0,0 +1,27 @@
+import base64
+import json
+from typing import Any
+
+from fastapi import HTTPException, status
+
+from app.utilities.formatters.http_error import error_wrapper
+
+
+def encode_cursor(*values: Any) -> str:
+    """Packs the keyset pagination values of the last item into an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail=error_wrapper("Invalid cursor", "cursor"),
+        )
+
+    return values
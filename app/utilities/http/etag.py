@@ -0,0 +1,40 @@
+from typing import Any, Optional
+
+from fastapi import HTTPException, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """Builds a strong ETag out of the entity identity and version parts"""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Checks if the ETag is listed in the 'If-None-Match' header value
+
+    Uses the weak comparison the RFC 7232 requires for 'If-None-Match'
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def validate_etag(etag: str, if_none_match: Optional[str]) -> None:
+    """Raises '304 Not Modified' if the client already has the current entity"""
+    if etag_matches(etag, if_none_match):
+        raise HTTPException(
+            status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+        )
+
+
+def set_etag_headers(response: Response, etag: str) -> None:
+    # Clients may store the response but have to revalidate it on every use
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
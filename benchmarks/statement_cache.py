@@ -0,0 +1,136 @@
+"""Per-call Python overhead of the hot repository statements
+
+Compares building the statement on every call (the former repository code) with
+the pre-built bound statements and with lambda_stmt. Every call goes through the
+same compiled cache lookup as a real execution, so only the statement
+construction and cache key generation differ. No database is required, but the
+application settings have to be available in the environment.
+
+    python -m benchmarks.statement_cache
+"""
+import timeit
+from typing import Any, Callable
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+from sqlalchemy.orm import joinedload
+from sqlalchemy.util import LRUCache
+
+from app.models.db.attempts import Attempt
+from app.models.db.companies import CompanyUser
+from app.models.db.quizzes import Question
+from app.models.db.users import User
+from app.repository.attempt import _ATTEMPT_BY_ID
+from app.repository.company import _MEMBER_ROLE
+from app.repository.question import _QUESTION_BY_ID
+from app.repository.user import UserRepository
+
+NUMBER = 5000
+REPEAT = 5
+
+dialect = PGDialect_asyncpg()
+compiled_cache = LRUCache(1000)
+
+
+def execute(statement: Any) -> None:
+    # What Connection.execute() does before sending the statement to the driver
+    statement._compile_w_cache(dialect, compiled_cache=compiled_cache, column_keys=[])
+
+
+def exists_by_id_before(instance_id: int = 1) -> None:
+    query = select(User).where(User.id == instance_id)
+    execute(query.with_only_columns(User.id))
+
+
+def exists_by_id_after(instance_id: int = 1) -> None:
+    execute(UserRepository._exists_by_id_query)
+
+
+def exists_by_id_lambda(instance_id: int = 1) -> None:
+    execute(lambda_stmt(lambda: select(User.id).where(User.id == instance_id)))
+
+
+def get_attempt_data_before(attempt_id: int = 1) -> None:
+    execute(select(Attempt).where(Attempt.id == attempt_id))
+
+
+def get_attempt_data_after(attempt_id: int = 1) -> None:
+    execute(_ATTEMPT_BY_ID)
+
+
+def get_attempt_data_lambda(attempt_id: int = 1) -> None:
+    execute(lambda_stmt(lambda: select(Attempt).where(Attempt.id == attempt_id)))
+
+
+def get_question_by_id_before(question_id: int = 1) -> None:
+    execute(
+        select(Question)
+        .options(joinedload(Question.answers))
+        .where(Question.id == question_id)
+    )
+
+
+def get_question_by_id_after(question_id: int = 1) -> None:
+    execute(_QUESTION_BY_ID)
+
+
+def get_question_by_id_lambda(question_id: int = 1) -> None:
+    execute(
+        lambda_stmt(
+            lambda: select(Question)
+            .options(joinedload(Question.answers))
+            .where(Question.id == question_id)
+        )
+    )
+
+
+def get_member_role_before(company_id: int = 1, user_id: int = 1) -> None:
+    execute(
+        select(CompanyUser.role).where(
+            (CompanyUser.company_id == company_id) & (CompanyUser.user_id == user_id)
+        )
+    )
+
+
+def get_member_role_after(company_id: int = 1, user_id: int = 1) -> None:
+    execute(_MEMBER_ROLE)
+
+
+def get_member_role_lambda(company_id: int = 1, user_id: int = 1) -> None:
+    execute(
+        lambda_stmt(
+            lambda: select(CompanyUser.role).where(
+                (CompanyUser.company_id == company_id)
+                & (CompanyUser.user_id == user_id)
+            )
+        )
+    )
+
+
+def measure(func: Callable[[], None]) -> float:
+    """Returns the best time of a single call in microseconds"""
+    func()
+    return min(timeit.repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e6
+
+
+def main() -> None:
+    cases = [
+        "exists_by_id",
+        "get_attempt_data",
+        "get_question_by_id",
+        "get_member_role",
+    ]
+
+    print(f"{'query':<20}{'before':>10}{'lambda':>10}{'pre-built':>12}{'speedup':>10}")
+    for case in cases:
+        before = measure(globals()[f"{case}_before"])
+        lambda_time = measure(globals()[f"{case}_lambda"])
+        after = measure(globals()[f"{case}_after"])
+        print(
+            f"{case:<20}{before:>8.1f}us{lambda_time:>8.1f}us{after:>10.1f}us"
+            f"{before / after:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
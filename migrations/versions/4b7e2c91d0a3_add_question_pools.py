@@ -0,0 +1,53 @@
+"""add question pools
+
+Revision ID: 4b7e2c91d0a3
+Revises: 2898c066a68f
+Create Date: 2026-10-19 10:12:41.203518
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4b7e2c91d0a3"
+down_revision = "2898c066a68f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "quizzes",
+        sa.Column("questions_per_attempt", sa.Integer(), nullable=True),
+    )
+    op.add_column(
+        "quizzes",
+        sa.Column(
+            "question_ids",
+            sa.ARRAY(sa.Integer()),
+            nullable=False,
+            server_default="{}",
+        ),
+    )
+    op.add_column(
+        "attempts",
+        sa.Column(
+            "question_ids",
+            sa.ARRAY(sa.Integer()),
+            nullable=False,
+            server_default="{}",
+        ),
+    )
+
+    # Fill the question pools of the existing quizzes
+    op.execute(
+        "UPDATE quizzes SET question_ids = ARRAY("
+        "SELECT questions.id FROM questions "
+        "WHERE questions.quiz_id = quizzes.id ORDER BY questions.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("attempts", "question_ids")
+    op.drop_column("quizzes", "question_ids")
+    op.drop_column("quizzes", "questions_per_attempt")
@@ -0,0 +1,33 @@
+"""add company staff count
+
+Revision ID: 5e0b7d4c9a12
+Revises: c3f81a6d2e57
+Create Date: 2026-10-19 14:41:53.072316
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e0b7d4c9a12"
+down_revision = "c3f81a6d2e57"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "companies",
+        sa.Column("staff_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Count the members of the existing companies
+    op.execute(
+        "UPDATE companies SET staff_count = ("
+        "SELECT count(*) FROM company_user "
+        "WHERE company_user.company_id = companies.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("companies", "staff_count")
@@ -0,0 +1,31 @@
+"""add quiz and company versions
+
+Revision ID: 91c5d3e8a7f2
+Revises: 4b7e2c91d0a3
+Create Date: 2026-10-19 11:02:17.845120
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "91c5d3e8a7f2"
+down_revision = "4b7e2c91d0a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "quizzes",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+    op.add_column(
+        "companies",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("companies", "version")
+    op.drop_column("quizzes", "version")
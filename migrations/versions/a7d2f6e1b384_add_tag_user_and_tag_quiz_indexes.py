@@ -0,0 +1,24 @@
+"""add tag_user and tag_quiz indexes
+
+Revision ID: a7d2f6e1b384
+Revises: 5e0b7d4c9a12
+Create Date: 2026-10-19 15:34:20.918736
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a7d2f6e1b384"
+down_revision = "5e0b7d4c9a12"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_tag_user_user_id", "tag_user", ["user_id"])
+    op.create_index("ix_tag_quiz_quiz_id", "tag_quiz", ["quiz_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tag_quiz_quiz_id", table_name="tag_quiz")
+    op.drop_index("ix_tag_user_user_id", table_name="tag_user")
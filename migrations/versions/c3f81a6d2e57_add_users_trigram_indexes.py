@@ -0,0 +1,31 @@
+"""add users trigram indexes
+
+Revision ID: c3f81a6d2e57
+Revises: 91c5d3e8a7f2
+Create Date: 2026-10-19 13:26:08.517904
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3f81a6d2e57"
+down_revision = "91c5d3e8a7f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in ["name", "email", "phone_number"]:
+        op.create_index(
+            f"ix_users_{column}_trgm",
+            "users",
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    for column in ["name", "email", "phone_number"]:
+        op.drop_index(f"ix_users_{column}_trgm", table_name="users")
@@ -0,0 +1,257 @@
+"""Fixtures of the endpoint tests
+
+The tests run against real PostgreSQL and Redis servers configured as for the
+application (.env or the environment). They use a separate database, named
+after POSTGRES_DB with the "_test" suffix unless TEST_POSTGRES_DB is set, which
+is created and migrated on the first run, and Redis database 15 unless
+TEST_REDIS_URL is set. The tests are skipped when PostgreSQL is unavailable.
+The unit tests need neither of the servers.
+"""
+import asyncio
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, ContextManager, Iterator, Optional
+from urllib.parse import urlsplit, urlunsplit
+from uuid import uuid4
+
+import decouple
+
+# The settings are read when the application is imported, so the test servers
+# have to be chosen first. The required settings get placeholders, so that the
+# unit tests run without a configured environment
+REQUIRED_SETTINGS = {
+    "FRONT_HOST": "localhost",
+    "FRONT_PORT": "3000",
+    "DEBUG": "False",
+    "LOGGING_LEVEL": "INFO",
+    "IS_ALLOWED_CREDENTIALS": "True",
+    "JWT_SECRET": "secret",
+    "AUTH0_DOMAIN": "auth0.test",
+    "AUTH0_API_AUDIENCE": "api",
+    "AUTH0_ALGORITHMS": "RS256",
+    "AUTH0_ISSUER": "https://auth0.test/",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "",
+    "POSTGRES_DB": "db_name",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_HOST": "localhost",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "user",
+    "SMTP_PASSWORD": "pass",
+}
+for name, placeholder in REQUIRED_SETTINGS.items():
+    os.environ[name] = decouple.config(name, default=placeholder)
+
+os.environ["POSTGRES_DB"] = decouple.config(
+    "TEST_POSTGRES_DB", default=f"{decouple.config('POSTGRES_DB')}_test"
+)
+os.environ["REDIS_URL"] = decouple.config(
+    "TEST_REDIS_URL",
+    default=urlunsplit(urlsplit(decouple.config("REDIS_URL"))._replace(path="/15")),
+)
+os.environ["POSTGRES_REPLICA_HOST"] = ""
+os.environ["RATE_LIMIT_ENABLED"] = "False"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import asyncpg
+import pytest
+from alembic import command
+from alembic.config import Config
+from httpx import ASGITransport, AsyncClient
+from redis import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings.base import settings
+from app.core import request_metrics
+from app.core.database import Base, async_session_maker, engine, redis
+from app.main import app
+from app.models.db.companies import Company, CompanyUser, RoleEnum
+from app.models.db.quizzes import Answer, Question, QuestionTypeEnum, Quiz
+from app.models.db.users import Tag, TagQuiz, TagUser, User
+from app.securities.authorization.auth_handler import auth_handler
+from app.securities.authorization.password_hasher import password_hasher
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Every test user has the same password, hashed once
+PASSWORD = "password1"
+PASSWORD_HASH = password_hasher.pwd_context.hash(PASSWORD)
+
+
+async def _create_database() -> None:
+    connection = await asyncpg.connect(
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        host=settings.POSTGRES_HOST,
+        port=settings.POSTGRES_PORT,
+        database="postgres",
+    )
+    try:
+        exists = await connection.fetchval(
+            "SELECT 1 FROM pg_database WHERE datname = $1", settings.POSTGRES_DB
+        )
+        if not exists:
+            await connection.execute(f'CREATE DATABASE "{settings.POSTGRES_DB}"')
+    finally:
+        await connection.close()
+
+
+async def _truncate_tables() -> None:
+    tables = ", ".join(f'"{table.name}"' for table in Base.metadata.sorted_tables)
+    async with engine.begin() as connection:
+        await connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def database() -> None:
+    """Migrates the test database and clears the data of the previous run, the
+    tests that use it are skipped when PostgreSQL is unavailable"""
+    try:
+        asyncio.run(_create_database())
+    except (OSError, asyncpg.PostgresError) as error:
+        pytest.skip(f"PostgreSQL is not available: {error}")
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "migrations"))
+    command.upgrade(config, "head")
+
+    asyncio.run(_truncate_tables())
+    Redis.from_url(settings.REDIS_URL).flushdb()
+
+
+@pytest.fixture
+async def client(database: None) -> AsyncIterator[AsyncClient]:
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as test_client:
+        yield test_client
+
+    # Connections are bound to the event loop of the test
+    await engine.dispose()
+    await redis.connection_pool.disconnect()
+
+
+@pytest.fixture
+async def db_session(database: None) -> AsyncIterator[AsyncSession]:
+    async with async_session_maker() as session:
+        yield session
+
+
+def auth_headers(user: User) -> dict[str, str]:
+    return {"Authorization": f"Bearer {auth_handler.encode_token(user.id, user.email)}"}
+
+
+class Factory:
+    """Creates the test data directly in the database"""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def _save(self, *instances: Any) -> None:
+        self.session.add_all(instances)
+        await self.session.commit()
+
+    async def user(self, **fields: Any) -> User:
+        user = User(
+            email=f"{uuid4().hex[:12]}@example.com", password=PASSWORD_HASH, **fields
+        )
+        await self._save(user)
+        return user
+
+    async def company(self, owner: User) -> Company:
+        company = Company(title=f"Company {uuid4().hex[:12]}", staff_count=1)
+        await self._save(company)
+        await self._save(
+            CompanyUser(company_id=company.id, user_id=owner.id, role=RoleEnum.Owner)
+        )
+        return company
+
+    async def member(
+        self, company: Company, role: RoleEnum = RoleEnum.Employee, **fields: Any
+    ) -> User:
+        user = await self.user(**fields)
+        company.staff_count += 1
+        await self._save(
+            company, CompanyUser(company_id=company.id, user_id=user.id, role=role)
+        )
+        return user
+
+    async def tag(self, company: Company, users: Optional[list[User]] = None) -> Tag:
+        tag = Tag(title=f"Tag {uuid4().hex[:8]}", company_id=company.id)
+        await self._save(tag)
+        await self._save(
+            *[TagUser(tag_id=tag.id, user_id=user.id) for user in users or []]
+        )
+        return tag
+
+    async def quiz(self, company: Company, tags: list[Tag], questions: int) -> Quiz:
+        """Creates a quiz with single choice questions of two answers, the first
+        answer is the correct one"""
+        quiz = Quiz(
+            title=f"Quiz {uuid4().hex[:12]}",
+            description="Quiz created by the test factory",
+            company_id=company.id,
+            fully_created=True,
+            completion_time=10,
+            max_attempts_count=1,
+            start_date="01-01-2020",
+            end_date="01-01-2100",
+            start_time="00:00",
+            end_time="23:59",
+        )
+        await self._save(quiz)
+
+        new_questions = [
+            Question(
+                title=f"Question {number}",
+                quiz_id=quiz.id,
+                fully_created=True,
+                type=QuestionTypeEnum.SingleChoice,
+            )
+            for number in range(questions)
+        ]
+        await self._save(*new_questions)
+        await self._save(
+            *[
+                Answer(title=title, is_correct=is_correct, question_id=question.id)
+                for question in new_questions
+                for title, is_correct in [("Correct", True), ("Wrong", False)]
+            ],
+            *[TagQuiz(tag_id=tag.id, quiz_id=quiz.id) for tag in tags],
+        )
+
+        quiz.question_ids = [question.id for question in new_questions]
+        await self._save(quiz)
+        return quiz
+
+
+@pytest.fixture
+def factory(db_session: AsyncSession) -> Factory:
+    return Factory(db_session)
+
+
+@pytest.fixture
+def query_budget() -> (
+    Callable[..., ContextManager[list[request_metrics.RequestMetrics]]]
+):
+    """Fails the test if a request made inside the block executes more queries
+    or Redis calls than the budget, e.g.
+
+        with query_budget(max_queries=4, max_redis_calls=2):
+            await client.get(f"/companies/{company.id}/", headers=headers)
+    """
+
+    @contextmanager
+    def _query_budget(
+        max_queries: int, max_redis_calls: Optional[int] = None
+    ) -> Iterator[list[request_metrics.RequestMetrics]]:
+        with request_metrics.query_budget(max_queries, max_redis_calls) as collected:
+            yield collected
+        assert collected, "No request has been made inside the budget block"
+
+    return _query_budget
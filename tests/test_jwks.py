@@ -0,0 +1,124 @@
+"""Unit tests of the JWKS cache against a local stand-in of the JWKS endpoint"""
+import asyncio
+from typing import Any, Optional
+
+import pytest
+from jwt.exceptions import PyJWKClientError
+
+from app.securities.authorization.jwks import JWKSCache
+
+URL = "https://auth0.test/.well-known/jwks.json"
+
+
+def _key(kid: str) -> dict[str, str]:
+    # Symmetric keys don't need the cryptography package
+    return {"kty": "oct", "kid": kid, "k": "c2VjcmV0", "alg": "HS256", "use": "sig"}
+
+
+class JWKSEndpoint:
+    """Serves the given key ids, optionally failing or waiting to be released"""
+
+    def __init__(self, *kids: str) -> None:
+        self.kids = list(kids)
+        self.requests = 0
+        self.error: Optional[Exception] = None
+        self.released = asyncio.Event()
+        self.released.set()
+
+    async def __call__(self, url: str) -> dict[str, Any]:
+        assert url == URL
+        self.requests += 1
+        await self.released.wait()
+        if self.error is not None:
+            raise self.error
+        return {"keys": [_key(kid) for kid in self.kids]}
+
+
+def _cache(
+    endpoint: JWKSEndpoint, ttl: int = 3600, min_refresh_interval: int = 0
+) -> JWKSCache:
+    return JWKSCache(URL, ttl, min_refresh_interval, fetcher=endpoint)
+
+
+async def test_concurrent_requests_share_a_single_fetch():
+    endpoint = JWKSEndpoint("key-1")
+    endpoint.released.clear()
+    cache = _cache(endpoint)
+
+    requests = [asyncio.create_task(cache.get_signing_key("key-1")) for _ in range(10)]
+    await asyncio.sleep(0)
+    endpoint.released.set()
+    keys = await asyncio.gather(*requests)
+
+    assert endpoint.requests == 1
+    assert {key.key_id for key in keys} == {"key-1"}
+
+
+async def test_unknown_kid_refreshes_the_keys():
+    endpoint = JWKSEndpoint("key-1")
+    cache = _cache(endpoint)
+    await cache.get_signing_key("key-1")
+
+    # The keys have been rotated
+    endpoint.kids = ["key-1", "key-2"]
+    key = await cache.get_signing_key("key-2")
+
+    assert key.key_id == "key-2"
+    assert endpoint.requests == 2
+
+
+async def test_unknown_kid_refreshes_at_most_once_per_interval():
+    endpoint = JWKSEndpoint("key-1")
+    cache = _cache(endpoint, min_refresh_interval=3600)
+    await cache.get_signing_key("key-1")
+
+    for _ in range(3):
+        with pytest.raises(PyJWKClientError):
+            await cache.get_signing_key("unknown")
+
+    assert endpoint.requests == 1
+
+
+async def test_expired_keys_are_served_while_the_endpoint_is_down():
+    endpoint = JWKSEndpoint("key-1")
+    cache = _cache(endpoint, ttl=0, min_refresh_interval=3600)
+    await cache.get_signing_key("key-1")
+    cache._refreshed_at -= 3600
+
+    # The endpoint hangs until its timeout and then fails
+    endpoint.released.clear()
+    endpoint.error = ConnectionError("Connection refused")
+
+    for _ in range(5):
+        key = await asyncio.wait_for(cache.get_signing_key("key-1"), timeout=1)
+        assert key.key_id == "key-1"
+
+    # Only one refresh has been started in the background
+    assert endpoint.requests == 2
+    endpoint.released.set()
+    await asyncio.sleep(0.01)
+
+    key = await asyncio.wait_for(cache.get_signing_key("key-1"), timeout=1)
+    assert key.key_id == "key-1"
+    assert endpoint.requests == 2
+
+
+async def test_expired_keys_are_replaced_by_the_background_refresh():
+    endpoint = JWKSEndpoint("key-1")
+    cache = _cache(endpoint, ttl=0)
+    await cache.get_signing_key("key-1")
+
+    endpoint.kids = ["key-2"]
+    assert (await cache.get_signing_key("key-1")).key_id == "key-1"
+    await asyncio.sleep(0.01)
+
+    assert (await cache.get_signing_key("key-2")).key_id == "key-2"
+
+
+async def test_failed_first_fetch_raises():
+    endpoint = JWKSEndpoint("key-1")
+    endpoint.error = ConnectionError("Connection refused")
+    cache = _cache(endpoint)
+
+    with pytest.raises(PyJWKClientError, match="Failed to load JWKS"):
+        await cache.get_signing_key("key-1")
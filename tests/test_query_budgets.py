@@ -0,0 +1,92 @@
+"""Query budgets of the endpoints that used to run N+1 queries
+
+Every endpoint is called with growing amounts of the related data under the same
+budget, so a query per question, tag or member fails the test.
+"""
+from uuid import uuid4
+
+import pytest
+
+from app.models.db.companies import RoleEnum
+from tests.conftest import PASSWORD, auth_headers
+
+FINISH_ATTEMPT_QUERIES = 5
+FINISH_ATTEMPT_REDIS_CALLS = 1
+
+ADD_MEMBER_QUERIES = 7
+ADD_MEMBER_REDIS_CALLS = 5
+
+GET_COMPANY_QUERIES = 2
+GET_COMPANY_REDIS_CALLS = 2
+
+
+@pytest.mark.parametrize("questions_count", [1, 10])
+async def test_finish_attempt_query_budget(
+    client, factory, query_budget, questions_count
+):
+    owner = await factory.user()
+    company = await factory.company(owner)
+    employee = await factory.member(company)
+    tag = await factory.tag(company, users=[employee])
+    quiz = await factory.quiz(company, [tag], questions=questions_count)
+    headers = auth_headers(employee)
+
+    response = await client.post(f"/quizzes/{quiz.id}/attempt/start/", headers=headers)
+    assert response.status_code == 200, response.text
+    attempt = response.json()
+
+    for question in attempt["questions"]:
+        correct_answer = next(
+            answer for answer in question["answers"] if answer["title"] == "Correct"
+        )
+        response = await client.post(
+            f"/attempts/{attempt['id']}/answer-question/{question['id']}/",
+            json={"answers": [correct_answer["id"]]},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+
+    with query_budget(FINISH_ATTEMPT_QUERIES, FINISH_ATTEMPT_REDIS_CALLS):
+        response = await client.post(
+            f"/attempts/{attempt['id']}/finish/", headers=headers
+        )
+
+    assert response.status_code == 200, response.text
+    assert float(response.json()["result"]) == questions_count
+
+
+@pytest.mark.parametrize("tags_count", [1, 5])
+async def test_add_member_query_budget(client, factory, query_budget, tags_count):
+    owner = await factory.user()
+    company = await factory.company(owner)
+    tags = [await factory.tag(company) for _ in range(tags_count)]
+
+    with query_budget(ADD_MEMBER_QUERIES, ADD_MEMBER_REDIS_CALLS):
+        response = await client.post(
+            f"/companies/{company.id}/members/add/",
+            json={
+                "email": f"{uuid4().hex[:12]}@example.com",
+                "password": PASSWORD,
+                "role": "employee",
+                "tags": [tag.id for tag in tags],
+            },
+            headers=auth_headers(owner),
+        )
+
+    assert response.status_code == 201, response.text
+
+
+@pytest.mark.parametrize("members_count", [1, 10])
+async def test_get_company_query_budget(client, factory, query_budget, members_count):
+    owner = await factory.user()
+    company = await factory.company(owner)
+    for _ in range(members_count):
+        await factory.member(company, RoleEnum.Tester)
+
+    with query_budget(GET_COMPANY_QUERIES, GET_COMPANY_REDIS_CALLS):
+        response = await client.get(
+            f"/companies/{company.id}/", headers=auth_headers(owner)
+        )
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()["users"]) == members_count + 1
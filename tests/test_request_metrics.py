@@ -0,0 +1,142 @@
+"""Unit tests of the request metrics, they need neither PostgreSQL nor Redis"""
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core import request_metrics
+from app.core.request_metrics import (
+    RequestMetrics,
+    RequestMetricsMiddleware,
+    count_redis_call,
+    get_request_metrics,
+    query_budget,
+    setup_query_metrics,
+)
+
+
+def _finish_request(queries: int, redis_calls: int = 0) -> RequestMetrics:
+    """Reports the metrics of a request to the observers, as the middleware does"""
+    metrics = RequestMetrics(
+        method="GET", path="/companies/1/", queries=queries, redis_calls=redis_calls
+    )
+    metrics.statements["SELECT * FROM users WHERE id = $1"] = queries
+    for observer in request_metrics._observers:
+        observer(metrics)
+    return metrics
+
+
+def test_query_budget_collects_the_requests_within_the_budget():
+    with query_budget(max_queries=2, max_redis_calls=1) as collected:
+        first = _finish_request(queries=2, redis_calls=1)
+        second = _finish_request(queries=1)
+
+    assert collected == [first, second]
+    assert request_metrics._observers == []
+
+
+def test_query_budget_fails_on_too_many_queries():
+    with pytest.raises(AssertionError) as error:
+        with query_budget(max_queries=2):
+            _finish_request(queries=3)
+
+    assert "executed 3 queries, the budget is 2" in str(error.value)
+    assert "3x SELECT * FROM users WHERE id = $1" in str(error.value)
+    assert request_metrics._observers == []
+
+
+def test_query_budget_fails_on_too_many_redis_calls():
+    with pytest.raises(AssertionError, match="made 3 Redis calls, the budget is 2"):
+        with query_budget(max_queries=5, max_redis_calls=2):
+            _finish_request(queries=1, redis_calls=3)
+
+
+def test_query_budget_ignores_the_requests_outside_the_block():
+    with query_budget(max_queries=1) as collected:
+        pass
+    _finish_request(queries=10)
+
+    assert collected == []
+
+
+async def test_middleware_reports_the_request_metrics():
+    async def app(scope, receive, send):
+        get_request_metrics().queries += 2
+        count_redis_call()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    middleware = RequestMetricsMiddleware(app, expose_headers=True)
+    scope = {"type": "http", "method": "GET", "path": "/companies/1/", "headers": []}
+    with query_budget(max_queries=2, max_redis_calls=1) as collected:
+        await middleware(scope, None, send)
+
+    assert [(metrics.queries, metrics.redis_calls) for metrics in collected] == [(2, 1)]
+    assert (b"x-db-queries", b"2") in messages[0]["headers"]
+    assert (b"x-redis-calls", b"1") in messages[0]["headers"]
+    assert get_request_metrics() is None
+
+
+@pytest.fixture
+def engine():
+    sync_engine = create_engine("sqlite://")
+    # setup_query_metrics only needs the sync engine behind the async one
+    yield SimpleNamespace(sync_engine=sync_engine)
+    sync_engine.dispose()
+
+
+@pytest.fixture
+def logger(monkeypatch):
+    logger = Mock()
+    monkeypatch.setattr(request_metrics, "logger", logger)
+    return logger
+
+
+def _run_request(engine, statements: list[str]) -> RequestMetrics:
+    metrics = RequestMetrics(method="GET", path="/quizzes/1/")
+    token = request_metrics._current_metrics.set(metrics)
+    try:
+        with engine.sync_engine.connect() as connection:
+            for statement in statements:
+                connection.execute(text(statement))
+    finally:
+        request_metrics._current_metrics.reset(token)
+    return metrics
+
+
+def test_repeated_statement_warns_about_n_plus_one(engine, logger):
+    setup_query_metrics(engine, n_plus_one_threshold=3)
+
+    metrics = _run_request(engine, ["SELECT 1"] * 4)
+
+    assert metrics.queries == 4
+    assert metrics.statements["SELECT 1"] == 4
+    # The warning is logged once, when the threshold is reached
+    logger.warning.assert_called_once()
+    message = logger.warning.call_args.args[0]
+    assert "Possible N+1 query in GET /quizzes/1/" in message
+    assert "executed 3 times" in message
+
+
+def test_different_statements_dont_warn(engine, logger):
+    setup_query_metrics(engine, n_plus_one_threshold=3)
+
+    metrics = _run_request(engine, ["SELECT 1", "SELECT 2", "SELECT 1", "SELECT 3"])
+
+    assert metrics.queries == 4
+    logger.warning.assert_not_called()
+
+
+def test_queries_outside_a_request_are_not_counted(engine, logger):
+    setup_query_metrics(engine, n_plus_one_threshold=1)
+
+    with engine.sync_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    logger.warning.assert_not_called()